@@ -0,0 +1,75 @@
+import re
+import sys
+import time
+import random
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+# O benchmark roda direto da pasta benchmarks/; o pacote etl_usgs fica na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from etl_usgs.transformacao import limpar_colunas_producao  # noqa: E402
+
+
+def gerar_csv_mcs(n_linhas: int, anos: list, seed: int = 0) -> str:
+    # CSV sintético no layout antigo do MCS, com as notas de rodapé que aparecem nos arquivos reais
+    rnd = random.Random(seed)
+    colunas = [f"prod_kt_{ano}" if i % 2 else f"prod_t_{ano}" for i, ano in enumerate(anos)]
+    linhas = ["Source,Country,Type," + ",".join(colunas)]
+    for i in range(n_linhas):
+        valores = []
+        for _ in colunas:
+            sorteio = rnd.random()
+            if sorteio < 0.05:
+                valores.append("W")
+            elif sorteio < 0.10:
+                valores.append("NA")
+            elif sorteio < 0.20:
+                valores.append(f'"{rnd.randint(1, 99)},{rnd.randint(0, 999):03d}e"')
+            else:
+                valores.append(str(rnd.randint(1, 99999)))
+        linhas.append(f"MCS,Country {i},Mine," + ",".join(valores))
+    return "\n".join(linhas) + "\n"
+
+
+def limpar_por_coluna(df: pd.DataFrame, colunas: list) -> pd.DataFrame:
+    # Implementação anterior: astype(str) + regex + to_numeric + escala, coluna a coluna
+    for col in colunas:
+        df[col] = df[col].astype(str).str.replace(r"[^\d\.\-]", "", regex=True)
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+        if '_kt_' in col.lower():
+            df[col] = df[col] * 1000
+    return df
+
+
+def medir(funcao, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(n_linhas: int = 50_000, repeticoes: int = 5):
+    anos = list(range(2015, 2025))
+    df = pd.read_csv(StringIO(gerar_csv_mcs(n_linhas, anos)), sep=",", thousands=",", quotechar='"')
+    colunas = [col for col in df.columns if re.match(r'prod_(?:t|kt)_\d{4}$', col)]
+
+    antigo = limpar_por_coluna(df.copy(), colunas)[colunas].to_numpy(dtype="float64")
+    novo = limpar_colunas_producao(df, colunas)
+    assert pd.DataFrame(antigo).equals(pd.DataFrame(novo)), "resultados divergentes"
+
+    t_antigo = medir(lambda: limpar_por_coluna(df.copy(), colunas), repeticoes)
+    t_novo = medir(lambda: limpar_colunas_producao(df, colunas), repeticoes)
+
+    print(f"{n_linhas} linhas x {len(colunas)} colunas de produção")
+    print(f"  coluna a coluna: {t_antigo * 1000:8.1f} ms")
+    print(f"  kernel único:    {t_novo * 1000:8.1f} ms")
+    print(f"  speedup:         {t_antigo / t_novo:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
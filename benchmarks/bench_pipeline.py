@@ -0,0 +1,156 @@
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+import http.server
+import functools
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+# O benchmark roda direto da pasta benchmarks/; o pacote etl_usgs fica na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fixtures_mcs import gerar_releases, commodities_legado, commodities_2025  # noqa: E402
+from etl_usgs import mapas, normalizacao, transformacao, rede, saidas  # noqa: E402
+
+
+def medir(funcao, repeticoes: int) -> tuple:
+    # Melhor tempo entre as repetições e o resultado da última execução
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+@contextlib.contextmanager
+def servidor_stub(pasta: Path):
+    # Servidor HTTP local servindo os ZIPs sintéticos no lugar do ScienceBase
+    handler = functools.partial(_HandlerSilencioso, directory=str(pasta))
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_port}"
+    finally:
+        servidor.shutdown()
+
+
+class _HandlerSilencioso(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do ETL USGS com releases MCS sintéticos")
+    parser.add_argument("--commodities", type=int, default=18)
+    parser.add_argument("--paises", type=int, default=60)
+    parser.add_argument("--anos", type=int, default=5, help="colunas de produção (anos) por CSV")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--formatos", default="excel,parquet,arrow,csv.gz")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON com os resultados (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    pasta = Path(tempfile.mkdtemp(prefix="bench_usgs_"))
+    etapas = {}
+    try:
+        inicio = time.perf_counter()
+        zips = gerar_releases(pasta / "fixtures", args.commodities, args.paises, args.anos)
+        etapas["gerar_fixtures"] = {"segundos": time.perf_counter() - inicio, "bytes": sum(p.stat().st_size for p in zips.values())}
+
+        # Índice e mapa de commodities do tamanho pedido (além das 18 reais, se for o caso)
+        indice = transformacao.montar_indice_selecao(transformacao.anos_releases_legado, commodities_legado(args.commodities))
+        mapas.mapa_commodities.update(commodities_legado(args.commodities))
+        normalizacao.normalizador_commodities_2025.update(normalizacao.montar_normalizador(commodities_2025(args.commodities)))
+
+        # Download: servidor stub local, cache frio (rede) e cache quente (nenhuma transferência)
+        with servidor_stub(pasta / "fixtures") as url_base, contextlib.redirect_stdout(StringIO()):
+            sessao = rede.criar_sessao_http()
+            arquivos = [{'name': p.name, 'url': f"{url_base}/{p.name}"} for p in zips.values()]
+
+            def baixar(cache_dir):
+                with rede.ThreadPoolExecutor(max_workers=len(arquivos)) as executor:
+                    return list(executor.map(lambda f: rede.baixar_arquivo_com_cache(sessao, "bench", f, cache_dir), arquivos))
+
+            def download_frio():
+                shutil.rmtree(pasta / "cache", ignore_errors=True)
+                return baixar(pasta / "cache")
+
+            etapas["download_stub"] = {"segundos": medir(download_frio, args.repeticoes)[0]}
+            etapas["download_stub_cache"] = {"segundos": medir(lambda: baixar(pasta / "cache"), args.repeticoes)[0]}
+
+        # Descompactação pura dos membros selecionados (sem parsing)
+        def descompactar():
+            total = 0
+            for ano, caminho in zips.items():
+                with zipfile.ZipFile(caminho) as z:
+                    membros = transformacao.selecionar_membros(z, indice) if ano < 2025 else [n for n in z.namelist() if n.endswith(".csv")]
+                    for membro in membros:
+                        total += len(z.read(membro))
+            return total
+
+        segundos, total = medir(descompactar, args.repeticoes)
+        etapas["unzip"] = {"segundos": segundos, "bytes_descompactados": total}
+
+        with contextlib.redirect_stdout(StringIO()):
+            # processar_zip: parse, limpeza e melt dos releases no layout antigo
+            legado = [(ano, caminho) for ano, caminho in zips.items() if ano < 2025]
+            segundos, dfs_legado = medir(
+                lambda: [df for _, caminho in legado for df in transformacao.processar_zip(caminho, indice, "bench")], args.repeticoes
+            )
+            etapas["processar_zip"] = {"segundos": segundos, "csvs": len(dfs_legado), "linhas": sum(len(df) for df in dfs_legado)}
+
+            # Transformação do layout de 2025
+            with zipfile.ZipFile(zips[2025]) as z:
+                tarefas_2025 = [(str(zips[2025]), n, transformacao.FORMATO_2025, None, 2025) for n in z.namelist() if n.endswith(".csv")]
+            segundos, resultados_2025 = medir(lambda: transformacao.executar_tarefas(tarefas_2025, 1), args.repeticoes)
+            dfs_2025 = [df for _, df in resultados_2025]
+            etapas["transformar_2025"] = {"segundos": segundos, "csvs": len(dfs_2025), "linhas": sum(len(df) for df in dfs_2025)}
+
+        segundos, tabela = medir(lambda: transformacao.concatenar_tabelas(dfs_legado + dfs_2025), args.repeticoes)
+        etapas["concat"] = {"segundos": segundos, "linhas": len(tabela), "memoria_bytes": int(tabela.memory_usage(deep=True).sum())}
+
+        # Reconciliação entre releases sobrepostos (um valor por país/commodity/ano)
+        with contextlib.redirect_stdout(StringIO()):
+            segundos, reconciliada = medir(lambda: transformacao.reconciliar_releases(tabela), args.repeticoes)
+        etapas["reconciliar"] = {"segundos": segundos, "linhas": len(reconciliada), "duplicadas": len(tabela) - len(reconciliada)}
+
+        # Serialização em cada formato de saída
+        for formato in [f.strip() for f in args.formatos.split(",") if f.strip()]:
+            extensao, gravar = saidas.saidas[formato]
+            destino = pasta / f"tabela{extensao}"
+            segundos, _ = medir(lambda: gravar(tabela, destino), args.repeticoes)
+            etapas[f"serializar_{formato}"] = {"segundos": segundos, "bytes": destino.stat().st_size}
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    resultado = {
+        "parametros": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "ambiente": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "pyarrow": saidas.pa.__version__ if saidas.pa is not None else None,
+            "plataforma": platform.platform(),
+        },
+        "etapas": etapas,
+    }
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        args.saida.write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+    return resultado
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
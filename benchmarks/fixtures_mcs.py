@@ -0,0 +1,104 @@
+import sys
+import random
+import zipfile
+from pathlib import Path
+
+# Os benchmarks rodam direto da pasta benchmarks/; o pacote etl_usgs fica na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from etl_usgs import mapas  # noqa: E402
+
+
+def _valor_sintetico(rnd: random.Random) -> str:
+    # Distribuição aproximada dos valores dos CSVs do MCS, com as notas de rodapé reais
+    sorteio = rnd.random()
+    if sorteio < 0.05:
+        return "W"
+    if sorteio < 0.10:
+        return "NA"
+    if sorteio < 0.20:
+        return f'"{rnd.randint(1, 99)},{rnd.randint(0, 999):03d}e"'
+    if sorteio < 0.25:
+        return ""
+    return str(rnd.randint(1, 99999))
+
+
+def nomes_paises(n_paises: int) -> list:
+    # Países reais do mapa (alguns com o número de rodapé colado) e, além deles, nomes sintéticos
+    reais = [nome.title() for nome in mapas.mapa_paises if nome != "null"]
+    paises = []
+    for i in range(n_paises):
+        if i < len(reais):
+            paises.append(f"{reais[i]}{i % 10}" if i % 7 == 0 else reais[i])
+        else:
+            paises.append(f"Country {i}")
+    return paises
+
+
+def commodities_legado(n_commodities: int) -> dict:
+    # {abreviação: nome}; além das 18 reais, abreviações sintéticas
+    reais = list(mapas.mapa_commodities.items())
+    return {
+        (reais[i][0] if i < len(reais) else f"sx{i:03d}"): (reais[i][1] if i < len(reais) else f"Sintética {i}")
+        for i in range(n_commodities)
+    }
+
+
+def commodities_2025(n_commodities: int) -> dict:
+    # {nome em inglês como no CSV: nome traduzido}
+    reais = list(mapas.mapa_commodities_2025.items())
+    return {
+        (reais[i][0] if i < len(reais) else f"Synthetic {i}"): (reais[i][1] if i < len(reais) else f"Sintética {i}")
+        for i in range(n_commodities)
+    }
+
+
+def gerar_zip_legado(destino: Path, ano_release: int, commodities: dict, paises: list, n_anos: int, seed: int = 0) -> Path:
+    # ZIP no layout antigo: um mcsAAAA-<abrev>_world.csv por commodity, colunas prod_t/prod_kt por ano + *_notes
+    rnd = random.Random(seed + ano_release)
+    anos = list(range(ano_release - n_anos, ano_release))
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for i, abrev in enumerate(commodities):
+            unidade = "kt" if i % 2 else "t"
+            colunas = [f"prod_{unidade}_{ano}" for ano in anos]
+            linhas = ["Source,Country,Type," + ",".join(colunas) + ",prod_notes"]
+            tipos = ["Mine"] if abrev != "alumi" else ["smelter production", "refinery production"]
+            for pais in paises:
+                for tipo in tipos:
+                    valores = [_valor_sintetico(rnd) for _ in colunas]
+                    linhas.append(f'MCS{ano_release},"{pais}",{tipo},' + ",".join(valores) + ",")
+            z.writestr(f"MCS{ano_release}_World_Data/mcs{ano_release}-{abrev}_world.csv", "\n".join(linhas) + "\n")
+    return destino
+
+
+def gerar_zip_2025(destino: Path, commodities: dict, paises: list, n_anos: int, seed: int = 0) -> Path:
+    # ZIP no layout de 2025: COUNTRY/COMMODITY/UNIT_MEAS/PROD_*; uma linha por (commodity, país)
+    rnd = random.Random(seed + 2025)
+    anos = list(range(2025 - n_anos, 2025))
+    colunas = []
+    for ano in anos:
+        prefixo = "PROD_EST_" if ano == anos[-1] else "PROD_"
+        colunas += [f"{prefixo}{ano}", f"PROD_NOTES_{ano}"]
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for i, commodity in enumerate(commodities):
+            unidade = "thousand metric tons" if i % 2 else "metric tons"
+            linhas = ["Source,COUNTRY,COMMODITY,TYPE,UNIT_MEAS," + ",".join(colunas)]
+            for pais in paises:
+                valores = []
+                for _ in anos:
+                    valores += [str(rnd.randint(1, 99999)) if rnd.random() > 0.1 else "", ""]
+                linhas.append(f'MCS2025,"{pais}",{commodity},Mine,{unidade},' + ",".join(valores))
+            z.writestr(f"world/MCS2025_{commodity.strip().replace(' ', '_')}_World.csv", "\n".join(linhas) + "\n")
+    return destino
+
+
+def gerar_releases(pasta: Path, n_commodities: int, n_paises: int, n_anos: int, seed: int = 0) -> dict:
+    # Gera os quatro releases (2022-2024 no layout antigo, 2025 no novo) e devolve {ano: caminho do ZIP}
+    pasta.mkdir(parents=True, exist_ok=True)
+    paises = nomes_paises(n_paises)
+    zips = {
+        ano: gerar_zip_legado(pasta / f"mcs{ano}_world.zip", ano, commodities_legado(n_commodities), paises, n_anos, seed)
+        for ano in (2022, 2023, 2024)
+    }
+    zips[2025] = gerar_zip_2025(pasta / "mcs2025_world.zip", commodities_2025(n_commodities), paises, n_anos, seed)
+    return zips
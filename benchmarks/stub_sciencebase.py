@@ -0,0 +1,166 @@
+import sys
+import json
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+import http.server
+from pathlib import Path
+
+# O stub roda direto da pasta benchmarks/; o pacote etl_usgs fica na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fixtures_mcs  # noqa: E402
+from etl_usgs.mapas import sciencebase_ids  # noqa: E402
+
+# Servidor local que imita o catálogo do ScienceBase com os ZIPs sintéticos de fixtures_mcs, injetando falhas
+# (503, corpo cortado no meio, atraso, release fora do ar) para exercitar retentativas, retomada por Range
+# e isolamento de releases. Uso:
+#   python benchmarks/stub_sciencebase.py --porta 8765 --falhas 0.3 --cortes 0.3 --fora 2023
+#   USGS_SCIENCEBASE_URL=http://127.0.0.1:8765/catalog/item/{} python -m etl_usgs fetch
+
+
+class Falhas:
+    def __init__(self, taxa_503: float = 0.0, taxa_corte: float = 0.0, atraso: float = 0.0, fora: tuple = (), sem_range: bool = False, seed: int = 0):
+        self.taxa_503 = taxa_503
+        self.taxa_corte = taxa_corte
+        self.atraso = atraso
+        self.fora = set(fora)
+        self.sem_range = sem_range
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.contagem = {'requisicoes': 0, '503': 0, 'cortes': 0, 'ranges': 0}
+
+    def sortear(self, taxa: float) -> bool:
+        with self.lock:
+            return self.rnd.random() < taxa
+
+    def contar(self, chave: str):
+        with self.lock:
+            self.contagem[chave] += 1
+
+
+def criar_handler(zips: dict, falhas: Falhas):
+    # zips: {item_id: caminho do ZIP}; o ETag é o sha256 do arquivo
+    por_nome = {caminho.name: caminho for caminho in zips.values()}
+    etags = {nome: f'"{hashlib.sha256(caminho.read_bytes()).hexdigest()[:32]}"' for nome, caminho in por_nome.items()}
+    anos_por_id = {item_id: ano for ano, item_id in sciencebase_ids.items()}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def responder(self, status: int, corpo: bytes = b"", headers: dict = None):
+            self.send_response(status)
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            falhas.contar('requisicoes')
+            if falhas.atraso:
+                threading.Event().wait(falhas.atraso)
+            caminho = self.path.split("?")[0]
+
+            if caminho.startswith("/catalog/item/"):
+                item_id = caminho.rsplit("/", 1)[-1]
+                if item_id not in zips:
+                    return self.responder(404)
+                if anos_por_id.get(item_id) in falhas.fora:
+                    return self.responder(500)
+                if falhas.sortear(falhas.taxa_503):
+                    falhas.contar('503')
+                    return self.responder(503)
+                zip_item = zips[item_id]
+                corpo = json.dumps({
+                    'title': f"Mineral Commodity Summaries {anos_por_id.get(item_id)} (sintético)",
+                    'files': [{
+                        'name': zip_item.name,
+                        'url': f"http://{self.headers['Host']}/arquivos/{zip_item.name}",
+                        'size': zip_item.stat().st_size,
+                    }],
+                }).encode("utf-8")
+                return self.responder(200, corpo, {'Content-Type': "application/json"})
+
+            if caminho.startswith("/arquivos/"):
+                nome = caminho.rsplit("/", 1)[-1]
+                if nome not in por_nome:
+                    return self.responder(404)
+                if falhas.sortear(falhas.taxa_503):
+                    falhas.contar('503')
+                    return self.responder(503)
+                conteudo = por_nome[nome].read_bytes()
+                etag = etags[nome]
+                if self.headers.get("If-None-Match") == etag:
+                    return self.responder(304, headers={'ETag': etag})
+
+                status, inicio = 200, 0
+                intervalo = self.headers.get("Range")
+                if intervalo and not falhas.sem_range and self.headers.get("If-Range", etag) == etag:
+                    inicio = int(intervalo.removeprefix("bytes=").split("-")[0])
+                    if inicio >= len(conteudo):
+                        return self.responder(416, headers={'Content-Range': f"bytes */{len(conteudo)}"})
+                    status = 206
+                    falhas.contar('ranges')
+                corpo = conteudo[inicio:]
+
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(len(corpo)))
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {inicio}-{len(conteudo) - 1}/{len(conteudo)}")
+                self.end_headers()
+                if len(corpo) > 1 and falhas.sortear(falhas.taxa_corte):
+                    # Envia só parte do corpo e derruba a conexão, como uma rede instável
+                    falhas.contar('cortes')
+                    self.wfile.write(corpo[:len(corpo) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(corpo)
+                return
+
+            self.responder(404)
+
+    return Handler
+
+
+def iniciar(pasta: Path, falhas: Falhas, porta: int = 0, n_commodities: int = 18, n_paises: int = 60, n_anos: int = 5) -> http.server.ThreadingHTTPServer:
+    # Gera os releases sintéticos e sobe o servidor numa thread; devolve o servidor (server_port tem a porta)
+    zips = fixtures_mcs.gerar_releases(pasta, n_commodities, n_paises, n_anos)
+    zips = {sciencebase_ids[ano]: caminho for ano, caminho in zips.items() if ano in sciencebase_ids}
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", porta), criar_handler(zips, falhas))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="ScienceBase local com injeção de falhas")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração das requisições respondidas com 503")
+    parser.add_argument("--cortes", type=float, default=0.0, help="fração dos downloads cortados no meio do corpo")
+    parser.add_argument("--atraso", type=float, default=0.0, help="atraso (s) antes de cada resposta")
+    parser.add_argument("--fora", type=int, nargs="*", default=[], help="releases cujo item responde sempre 500")
+    parser.add_argument("--sem-range", action="store_true", help="ignora o cabeçalho Range (sempre 200)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    falhas = Falhas(args.falhas, args.cortes, args.atraso, args.fora, args.sem_range, args.seed)
+    servidor = iniciar(Path(tempfile.mkdtemp(prefix="stub_sciencebase_")), falhas, args.porta)
+    print(f"ScienceBase local em http://127.0.0.1:{servidor.server_port}/catalog/item/{{}} (Ctrl+C para sair)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\n{falhas.contagem}")
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
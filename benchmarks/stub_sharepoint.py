@@ -0,0 +1,268 @@
+import os
+import re
+import sys
+import json
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+import http.server
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+# O stub roda direto da pasta benchmarks/; o pacote etl_usgs fica na raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Servidor local que imita o SharePoint de um site para o upload do etl_usgs: Files/add da API REST (arquivos
+# pequenos) e a sessão de upload da API v2.0 (drives, createUploadSession, PUT com Content-Range, consulta de
+# nextExpectedRanges e cancelamento). Injeta falhas: 503 antes de gravar o bloco, confirmação perdida (o bloco é
+# gravado e a resposta é um 503 ou a conexão cai) e atraso. Os arquivos concluídos ficam em <pasta>/<biblioteca>/.
+# Uso:
+#   python benchmarks/stub_sharepoint.py --porta 8766 --falhas 0.2 --acks-perdidos 0.3
+#   python benchmarks/stub_sharepoint.py --enviar saida_usgs/USGS_producao.xlsx --bloco-kb 320 --acks-perdidos 0.5
+
+
+class Falhas:
+    def __init__(self, taxa_503: float = 0.0, taxa_ack_perdido: float = 0.0, atraso: float = 0.0, seed: int = 0):
+        self.taxa_503 = taxa_503
+        self.taxa_ack_perdido = taxa_ack_perdido
+        self.atraso = atraso
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.contagem = {'requisicoes': 0, '503': 0, 'acks_perdidos': 0, 'consultas': 0, 'blocos': 0}
+
+    def sortear(self, taxa: float) -> bool:
+        with self.lock:
+            return self.rnd.random() < taxa
+
+    def contar(self, chave: str):
+        with self.lock:
+            self.contagem[chave] += 1
+
+
+def criar_handler(pasta: Path, falhas: Falhas, biblioteca: str = "Documentos Compartilhados"):
+    # sessoes: {id: {'destino': Path, 'dados': bytearray, 'total': int ou None}}
+    sessoes = {}
+    lock = threading.Lock()
+    drive_id = "b!" + uuid.uuid5(uuid.NAMESPACE_URL, biblioteca).hex
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def responder(self, status: int, dados: dict = None, headers: dict = None):
+            corpo = json.dumps(dados).encode("utf-8") if dados is not None else b""
+            self.send_response(status)
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            if dados is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def ler_corpo(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def url_base(self) -> str:
+            return f"http://{self.headers['Host']}"
+
+        def item(self, destino: Path) -> dict:
+            relativo = destino.relative_to(pasta).as_posix()
+            return {
+                'id': uuid.uuid5(uuid.NAMESPACE_URL, relativo).hex,
+                'name': destino.name,
+                'size': destino.stat().st_size,
+                'eTag': f'"{destino.stat().st_mtime_ns}"',
+                'webUrl': f"{self.url_base()}/{quote(relativo)}",
+            }
+
+        def autorizado(self) -> bool:
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                self.responder(401, {'error': {'code': "unauthenticated"}})
+                return False
+            return True
+
+        def inicio(self) -> bool:
+            # Contagem, atraso e 503 antes de qualquer efeito; devolve False se a requisição já foi respondida
+            falhas.contar('requisicoes')
+            if falhas.atraso:
+                threading.Event().wait(falhas.atraso)
+            if falhas.sortear(falhas.taxa_503):
+                falhas.contar('503')
+                self.ler_corpo()
+                self.responder(503)
+                return False
+            return True
+
+        def do_GET(self):
+            if not self.inicio():
+                return
+            caminho = unquote(self.path.split("?")[0])
+
+            if caminho.startswith("/upload/"):
+                # Estado da sessão: o cliente usa para saber de onde continuar
+                falhas.contar('consultas')
+                with lock:
+                    sessao = sessoes.get(caminho.rsplit("/", 1)[-1])
+                    if sessao is None:
+                        return self.responder(404, {'error': {'code': "itemNotFound"}})
+                    return self.responder(200, {'nextExpectedRanges': [f"{len(sessao['dados'])}-"]})
+
+            if not self.autorizado():
+                return
+            if caminho.endswith("/_api/v2.0/drives"):
+                site = caminho.removesuffix("/_api/v2.0/drives")
+                return self.responder(200, {'value': [
+                    {'id': "b!outra", 'webUrl': f"{self.url_base()}{quote(site)}/Lista%20Qualquer"},
+                    {'id': drive_id, 'webUrl': f"{self.url_base()}{quote(site)}/{quote(biblioteca)}"},
+                ]})
+            encontrado = re.search(rf"/_api/v2\.0/drives/{re.escape(drive_id)}/root:/(.+):$", caminho)
+            if encontrado:
+                destino = pasta / biblioteca / encontrado.group(1)
+                if not destino.is_file():
+                    return self.responder(404, {'error': {'code': "itemNotFound"}})
+                return self.responder(200, self.item(destino))
+            self.responder(404)
+
+        def do_POST(self):
+            if not self.inicio():
+                return
+            corpo = self.ler_corpo()
+            caminho = unquote(self.path.split("?")[0])
+            if not self.autorizado():
+                return
+
+            encontrado = re.search(r"/_api/web/GetFolderByServerRelativeUrl\('(.*)'\)/Files/add\(url='(.*)',overwrite=true\)$", caminho)
+            if encontrado:
+                destino = pasta / encontrado.group(1).strip("/") / encontrado.group(2)
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                destino.write_bytes(corpo)
+                return self.responder(200, {'d': {'ServerRelativeUrl': "/" + destino.relative_to(pasta).as_posix()}})
+
+            encontrado = re.search(rf"/_api/v2\.0/drives/{re.escape(drive_id)}/root:/(.+):/createUploadSession$", caminho)
+            if encontrado:
+                id_sessao = uuid.uuid4().hex
+                with lock:
+                    sessoes[id_sessao] = {'destino': pasta / biblioteca / encontrado.group(1), 'dados': bytearray(), 'total': None}
+                return self.responder(200, {
+                    'uploadUrl': f"{self.url_base()}/upload/{id_sessao}",
+                    'nextExpectedRanges': ["0-"],
+                })
+            self.responder(404)
+
+        def do_PUT(self):
+            if not self.inicio():
+                return
+            corpo = self.ler_corpo()
+            caminho = unquote(self.path.split("?")[0])
+            if not caminho.startswith("/upload/"):
+                return self.responder(404)
+            if "Authorization" in self.headers:
+                # Como no serviço real, a uploadUrl já é autenticada e recusa o token
+                return self.responder(401, {'error': {'code': "unauthenticated"}})
+
+            intervalo = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+)", self.headers.get("Content-Range", ""))
+            if not intervalo:
+                return self.responder(400, {'error': {'code': "invalidRange"}})
+            inicio, fim, total = (int(valor) for valor in intervalo.groups())
+
+            with lock:
+                sessao = sessoes.get(caminho.rsplit("/", 1)[-1])
+                if sessao is None:
+                    return self.responder(404, {'error': {'code': "itemNotFound"}})
+                if inicio != len(sessao['dados']) or fim - inicio + 1 != len(corpo) or (sessao['total'] or total) != total:
+                    # Bloco fora de ordem ou repetido (já gravado numa tentativa anterior)
+                    return self.responder(416, {'error': {'code': "invalidRange"}, 'nextExpectedRanges': [f"{len(sessao['dados'])}-"]})
+                sessao['total'] = total
+                sessao['dados'].extend(corpo)
+                falhas.contar('blocos')
+
+                concluido = len(sessao['dados']) == total
+                if concluido:
+                    # O destino só é substituído com o último byte; a sessão deixa de existir
+                    destino = sessao['destino']
+                    destino.parent.mkdir(parents=True, exist_ok=True)
+                    temporario = destino.with_name(destino.name + ".stub")
+                    temporario.write_bytes(sessao['dados'])
+                    temporario.replace(destino)
+                    del sessoes[caminho.rsplit("/", 1)[-1]]
+
+            if falhas.sortear(falhas.taxa_ack_perdido):
+                # O bloco ficou gravado, mas o cliente não recebe a confirmação
+                falhas.contar('acks_perdidos')
+                if falhas.sortear(0.5):
+                    return self.responder(503)
+                self.close_connection = True
+                self.connection.close()
+                return
+            if concluido:
+                return self.responder(201, self.item(destino))
+            self.responder(202, {'nextExpectedRanges': [f"{fim + 1}-"]})
+
+        def do_DELETE(self):
+            if not self.inicio():
+                return
+            caminho = unquote(self.path.split("?")[0])
+            with lock:
+                if not caminho.startswith("/upload/") or sessoes.pop(caminho.rsplit("/", 1)[-1], None) is None:
+                    return self.responder(404)
+            self.responder(204)
+
+    return Handler
+
+
+def iniciar(pasta: Path, falhas: Falhas, porta: int = 0, biblioteca: str = "Documentos Compartilhados") -> http.server.ThreadingHTTPServer:
+    # Sobe o servidor numa thread; devolve o servidor (server_port tem a porta)
+    servidor = http.server.ThreadingHTTPServer(("127.0.0.1", porta), criar_handler(pasta, falhas, biblioteca))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="SharePoint local com injeção de falhas no upload")
+    parser.add_argument("--porta", type=int, default=8766)
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração das requisições respondidas com 503 sem efeito")
+    parser.add_argument("--acks-perdidos", type=float, default=0.0, help="fração dos blocos gravados cuja resposta se perde")
+    parser.add_argument("--atraso", type=float, default=0.0, help="atraso (s) antes de cada resposta")
+    parser.add_argument("--biblioteca", default="Documentos Compartilhados")
+    parser.add_argument("--pasta", type=Path, default=None, help="onde gravar os arquivos recebidos (padrão: temporária)")
+    parser.add_argument("--enviar", type=Path, default=None, help="envia este arquivo ao stub com o upload do etl_usgs e sai")
+    parser.add_argument("--bloco-kb", type=int, default=320)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pasta = args.pasta or Path(tempfile.mkdtemp(prefix="stub_sharepoint_"))
+    falhas = Falhas(args.falhas, args.acks_perdidos, args.atraso, args.seed)
+    servidor = iniciar(pasta, falhas, args.porta, args.biblioteca)
+    url = f"http://127.0.0.1:{servidor.server_port}"
+
+    if args.enviar:
+        # A biblioteca do stub vale para o etl_usgs, que lê SHAREPOINT_DOC ao ser importado
+        os.environ["SHAREPOINT_DOC"] = args.biblioteca
+        from etl_usgs.sharepoint import upload_arquivo_para_sharepoint
+
+        enviado = upload_arquivo_para_sharepoint(
+            "token-local", url, "/sites/etl", "USGS", args.enviar.name, args.enviar, tamanho_bloco=args.bloco_kb * 1024
+        )
+        recebido = pasta / args.biblioteca / "USGS" / args.enviar.name
+        integro = recebido.is_file() and recebido.read_bytes() == args.enviar.read_bytes()
+        print(f"{falhas.contagem} | enviado={enviado} | íntegro={integro} | {recebido}")
+        servidor.shutdown()
+        return 0 if enviado and integro else 1
+
+    print(f"SharePoint local em {url}/sites/etl, arquivos em {pasta} (Ctrl+C para sair)")
+    print(f"   SHAREPOINT_URL_RAIZ={url} SHAREPOINT_SITE=/sites/etl SHAREPOINT_DOC=\"{args.biblioteca}\"")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\n{falhas.contagem}")
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
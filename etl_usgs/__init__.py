@@ -0,0 +1,12 @@
+# ETL da produção mineral mundial do USGS (Mineral Commodity Summaries, via ScienceBase).
+# Importar o pacote não lê o .env, não autentica e não acessa a rede; as etapas ficam em
+# etl_usgs.pipeline e a linha de comando em "python -m etl_usgs".
+#
+#   config          variáveis do .env
+#   rede, cache     downloads do ScienceBase e cache local dos ZIPs
+#   transformacao   leitura dos CSVs e montagem da tabela longa
+#   incremental     manifesto + Parquet particionado
+#   banco           SQLite local com a tabela final e consultas (ranking, séries)
+#   saidas          excel, parquet, arrow, csv.gz
+#   autenticacao    MSAL (carregado sob demanda)
+#   sharepoint      upload em blocos
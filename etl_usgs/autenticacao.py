@@ -0,0 +1,79 @@
+import threading
+
+from .config import TENANT_ID, CLIENT_ID, CLIENT_SECRET, USERNAME, PASSWORD, SHAREPOINT_URL, USGS_TOKEN_CACHE
+
+# App MSAL, cache de tokens e sessão HTTP do SharePoint são criados sob demanda e reaproveitados:
+# importar o módulo não faz nenhuma chamada de rede nem carrega o msal
+_app_msal = None
+_sessao_sharepoint = None
+_lock_auth = threading.Lock()
+
+def _criar_cache_tokens():
+    # Com USGS_TOKEN_CACHE definido, persiste os tokens em disco criptografados (DPAPI/Keychain/libsecret)
+    # via msal-extensions; caso contrário o cache fica só em memória
+    if USGS_TOKEN_CACHE:
+        try:
+            from msal_extensions import PersistedTokenCache, build_encrypted_persistence
+            return PersistedTokenCache(build_encrypted_persistence(USGS_TOKEN_CACHE))
+        except ImportError:
+            print("Atenção: msal-extensions não instalado, cache de tokens apenas em memória")
+        except Exception as e:
+            print(f"Atenção: cache criptografado indisponível ({e}), cache de tokens apenas em memória")
+    import msal
+    return msal.SerializableTokenCache()
+
+def _obter_app_msal():
+    global _app_msal
+    if _app_msal is None:
+        import msal
+
+        AUTHORITY = f"https://login.microsoftonline.com/{TENANT_ID}"
+
+        # Usa ConfidentialClientApplication porque estamos usando um client secret
+        _app_msal = msal.ConfidentialClientApplication(
+            client_id=CLIENT_ID,
+            client_credential=CLIENT_SECRET,
+            authority=AUTHORITY,
+            token_cache=_criar_cache_tokens()
+            )
+    return _app_msal
+
+def obter_sessao_sharepoint():
+    # Uma única sessão keep-alive para todas as chamadas ao SharePoint
+    global _sessao_sharepoint
+    if _sessao_sharepoint is None:
+        from .rede import criar_sessao_http
+
+        _sessao_sharepoint = criar_sessao_http()
+    return _sessao_sharepoint
+
+def get_acesstoken():
+    SCOPE = [f"{SHAREPOINT_URL}/.default"]
+
+    with _lock_auth:
+        app = _obter_app_msal()
+
+        # Primeiro tenta o cache: o MSAL devolve o token guardado ou o renova em silêncio
+        # (com o refresh token) quando está perto de expirar
+        result = None
+        contas = app.get_accounts(username=USERNAME)
+        if contas:
+            result = app.acquire_token_silent(SCOPE, account=contas[0])
+            if result and "access_token" in result:
+                return result['access_token']
+
+        # Adquire o token usando o fluxo de nome de usuário/senha (ROPC)
+        result = app.acquire_token_by_username_password(
+            username=USERNAME,
+            password=PASSWORD,
+            scopes=SCOPE
+            )
+
+    if "access_token" in result:
+        access_token = result['access_token']
+        print("\nToken de acesso gerado com sucesso!")
+        return access_token
+    else:
+        print("\n❌ Erro ao obter o token:")
+        print("Erro:", result.get("error"))
+        print("Descrição:", result.get("error_description"))
@@ -0,0 +1,151 @@
+import time
+import sqlite3
+import contextlib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from .config import USGS_BANCO
+from .mapas import mapa_paises
+
+# Banco local (SQLite, da biblioteca padrão) com a tabela longa normalizada: cada transform faz upsert
+# das linhas e as consultas abaixo respondem sem rodar o ETL nem baixar nada do SharePoint
+
+# Linhas de agregados publicadas junto com os países; ficam fora dos rankings
+PAIS_TOTAL_MUNDIAL = mapa_paises["world total (rounded)"]
+PAISES_AGREGADOS = [
+    mapa_paises[nome] for nome in (
+        "world total (rounded)", "world total (rounded), excluding u.s. production", "other countries", "null",
+    )
+]
+
+_ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS producao (
+    Commodity TEXT NOT NULL,
+    Country TEXT NOT NULL,
+    Tipo TEXT NOT NULL DEFAULT '',
+    Ano INTEGER NOT NULL,
+    Ocorrencia INTEGER NOT NULL DEFAULT 0,
+    Valor REAL,
+    Release INTEGER,
+    Estimado INTEGER NOT NULL DEFAULT 0,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (Commodity, Country, Tipo, Ano, Ocorrencia)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_producao_country ON producao (Country, Commodity, Ano);
+CREATE INDEX IF NOT EXISTS idx_producao_ano ON producao (Ano, Commodity, Tipo);
+"""
+
+@contextlib.contextmanager
+def conectar(caminho: Path = USGS_BANCO):
+    # Conexão com o esquema garantido; commit ao sair sem erro, rollback caso contrário
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conexao = sqlite3.connect(caminho)
+    try:
+        conexao.execute("PRAGMA journal_mode=WAL")  # leitores não bloqueiam durante a carga
+        # Banco de uma versão com outra chave (sem Tipo/Ocorrencia): a tabela é derivada, o próximo transform a recria
+        colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(producao)")]
+        if colunas and not {'Tipo', 'Ocorrencia'} <= set(colunas):
+            conexao.execute("DROP TABLE producao")
+        conexao.executescript(_ESQUEMA_SQL)
+        with conexao:
+            yield conexao
+    finally:
+        conexao.close()
+
+def gravar_banco(df: pd.DataFrame, caminho: Path = USGS_BANCO) -> int:
+    # Sincroniza o banco com a tabela longa numa única transação: upsert pela chave
+    # (Commodity, Country, Tipo, Ano, Ocorrencia) e remoção das linhas que não vieram nesta carga
+    # (anos/commodities fora da seleção, países que passaram a ter tradução...), que de outro modo seriam
+    # somadas em dobro nas consultas. Ocorrencia numera as repetições da mesma chave dentro de um release,
+    # que a reconciliação mantém; assim o banco tem as mesmas linhas das saídas. Linhas sem país ou
+    # commodity são ignoradas. Retorna o número de linhas gravadas no banco
+    if df.empty:
+        return 0
+    chaves_validas = df['Country'].notna() & df['Commodity'].notna()
+    if not chaves_validas.all():
+        print(f"Atenção: {int((~chaves_validas).sum())} linha(s) sem país ou commodity fora do banco local")
+        df = df[chaves_validas]
+    ocorrencia = df.groupby(['Commodity', 'Country', 'Tipo', 'Ano'], observed=True, sort=False).cumcount()
+    repetidas = int((ocorrencia > 0).sum())
+    if repetidas:
+        print(f"Atenção: {repetidas} linha(s) repetem país/commodity/tipo/ano no mesmo release, gravadas com Ocorrencia > 0")
+    agora = time.time()
+    linhas = zip(
+        df['Commodity'].astype(str),
+        df['Country'].astype(str),
+        df['Tipo'].astype(str),
+        df['Ano'].to_numpy(dtype="int64").tolist(),
+        ocorrencia.to_numpy(dtype="int64").tolist(),
+        df['Valor'].astype(object).where(df['Valor'].notna(), None),
+        df['Release'].to_numpy(dtype="int64").tolist(),
+        df['Estimado'].to_numpy(dtype="int64").tolist(),
+        np.full(len(df), agora).tolist(),
+    )
+    with conectar(caminho) as conexao:
+        conexao.executemany("""
+            INSERT INTO producao (Commodity, Country, Tipo, Ano, Ocorrencia, Valor, Release, Estimado, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (Commodity, Country, Tipo, Ano, Ocorrencia) DO UPDATE SET
+                Valor = excluded.Valor,
+                Release = excluded.Release,
+                Estimado = excluded.Estimado,
+                atualizado_em = excluded.atualizado_em
+        """, linhas)
+        # Toda linha desta carga tem atualizado_em = agora; as demais saíram da tabela
+        removidas = conexao.execute("DELETE FROM producao WHERE atualizado_em <> ?", (agora,)).rowcount
+        gravadas = conexao.execute("SELECT COUNT(*) FROM producao").fetchone()[0]
+    print(f"Banco local: {gravadas} linha(s) gravada(s), {removidas} removida(s) em {caminho}")
+    return gravadas
+
+def consultar(sql: str, parametros: tuple = (), caminho: Path = USGS_BANCO) -> pd.DataFrame:
+    with conectar(caminho) as conexao:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+
+def ranking_participacao(commodity: str, ano: int, limite: int = 10, caminho: Path = USGS_BANCO) -> pd.DataFrame:
+    # Países que mais produziram a commodity no ano e sua participação (%) na produção mundial, por tipo
+    # (mina, refinaria...). O total é a linha "Total mundial" publicada pelo USGS; sem ela, a soma dos países
+    agregados = ", ".join("?" * len(PAISES_AGREGADOS))
+    sql = f"""
+        WITH base AS (
+            SELECT Country, Tipo, Valor, Release, Estimado FROM producao
+            WHERE Commodity = ? AND Ano = ? AND Valor IS NOT NULL
+        ),
+        total AS (
+            SELECT Tipo, COALESCE(
+                MAX(CASE WHEN Country = ? THEN Valor END),
+                SUM(CASE WHEN Country NOT IN ({agregados}) THEN Valor END)
+            ) AS Total
+            FROM base GROUP BY Tipo
+        ),
+        ranking AS (
+            SELECT
+                RANK() OVER (PARTITION BY base.Tipo ORDER BY Valor DESC) AS Posicao,
+                base.Tipo, Country, Valor, 100.0 * Valor / total.Total AS Participacao, Release, Estimado
+            FROM base JOIN total ON total.Tipo = base.Tipo
+            WHERE Country NOT IN ({agregados})
+        )
+        SELECT * FROM ranking WHERE Posicao <= ? ORDER BY Tipo, Posicao
+    """
+    parametros = (commodity, int(ano), PAIS_TOTAL_MUNDIAL, *PAISES_AGREGADOS, *PAISES_AGREGADOS, int(limite))
+    return consultar(sql, parametros, caminho)
+
+def serie_historica(commodity: str, pais: str = None, caminho: Path = USGS_BANCO) -> pd.DataFrame:
+    # Produção ano a ano de um país (ou o total mundial publicado, sem país), por tipo
+    sql = "SELECT Tipo, Ano, Valor, Release, Estimado FROM producao WHERE Commodity = ? AND Country = ? ORDER BY Tipo, Ano, Ocorrencia"
+    return consultar(sql, (commodity, pais or PAIS_TOTAL_MUNDIAL), caminho)
+
+def producao_por_commodity(ano: int, caminho: Path = USGS_BANCO) -> pd.DataFrame:
+    # Produção mundial de cada commodity/tipo no ano (linha de total do USGS ou soma dos países)
+    agregados = ", ".join("?" * len(PAISES_AGREGADOS))
+    sql = f"""
+        SELECT
+            Commodity, Tipo,
+            COALESCE(MAX(CASE WHEN Country = ? THEN Valor END), SUM(CASE WHEN Country NOT IN ({agregados}) THEN Valor END)) AS Total,
+            SUM(CASE WHEN Country NOT IN ({agregados}) AND Valor IS NOT NULL THEN 1 ELSE 0 END) AS Paises
+        FROM producao
+        WHERE Ano = ?
+        GROUP BY Commodity, Tipo
+        ORDER BY Commodity, Tipo
+    """
+    return consultar(sql, (PAIS_TOTAL_MUNDIAL, *PAISES_AGREGADOS, *PAISES_AGREGADOS, int(ano)), caminho)
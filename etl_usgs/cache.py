@@ -0,0 +1,147 @@
+import json
+import time
+import threading
+from pathlib import Path
+
+from .config import USGS_CACHE_DIR, USGS_CACHE_MAX_MB, USGS_CACHE_MAX_DIAS
+
+# Cache local dos ZIPs: blobs endereçados pelo sha256 e um índice JSON {item_id/arquivo: entrada}.
+# Não depende de rede; a etapa transform lê os releases daqui sem baixar nada
+
+_lock_cache = threading.Lock()
+
+def _caminho_indice_cache(cache_dir: Path) -> Path:
+    return cache_dir / "indice.json"
+
+def ler_json(caminho: Path) -> dict:
+    if not caminho.exists():
+        return {}
+    try:
+        return json.loads(caminho.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError):
+        print(f"Atenção: arquivo {caminho} corrompido, ignorando")
+        return {}
+
+def gravar_json(caminho: Path, dados: dict):
+    # Grava num temporário e renomeia, para nunca deixar um JSON pela metade
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(".tmp")
+    temporario.write_text(json.dumps(dados, indent=2), encoding="utf-8")
+    temporario.replace(caminho)
+
+def carregar_indice_cache(cache_dir: Path = USGS_CACHE_DIR) -> dict:
+    return ler_json(_caminho_indice_cache(cache_dir))
+
+def salvar_indice_cache(indice: dict, cache_dir: Path = USGS_CACHE_DIR):
+    gravar_json(_caminho_indice_cache(cache_dir), indice)
+
+def ler_entrada_cache(chave: str, cache_dir: Path = USGS_CACHE_DIR) -> dict:
+    with _lock_cache:
+        return carregar_indice_cache(cache_dir).get(chave)
+
+def gravar_entrada_cache(chave: str, entrada: dict, cache_dir: Path = USGS_CACHE_DIR):
+    with _lock_cache:
+        indice = carregar_indice_cache(cache_dir)
+        indice[chave] = entrada
+        salvar_indice_cache(indice, cache_dir)
+
+def chave_cache(item_id: str, file_name: str) -> str:
+    return f"{item_id}/{file_name}"
+
+def caminho_blob(cache_dir: Path, sha256: str) -> Path:
+    # Conteúdo endereçado pelo hash: o mesmo ZIP publicado em dois itens ocupa um único arquivo
+    return cache_dir / "blobs" / sha256[:2] / f"{sha256}.zip"
+
+def versao_remota(file: dict) -> dict:
+    # Identificação da versão publicada segundo os metadados do ScienceBase
+    checksum = file.get('checksum') or {}
+    return {'checksum': checksum.get('value'), 'size': file.get('size')}
+
+def entrada_cache_valida(entrada: dict, versao: dict, cache_dir: Path) -> bool:
+    if not entrada or not caminho_blob(cache_dir, entrada['sha256']).exists():
+        return False
+    if versao['checksum']:
+        return entrada.get('checksum') == versao['checksum']
+    if versao['size'] is not None:
+        return entrada.get('size') == versao['size']
+    return False
+
+def registrar_acesso_cache(chave: str, cache_dir: Path, versao: dict = None):
+    with _lock_cache:
+        indice = carregar_indice_cache(cache_dir)
+        if chave in indice:
+            indice[chave]['ultimo_acesso'] = time.time()
+            if versao and versao['checksum']:
+                indice[chave]['checksum'] = versao['checksum']
+            salvar_indice_cache(indice, cache_dir)
+
+def limpar_cache(cache_dir: Path = USGS_CACHE_DIR, max_mb: float = USGS_CACHE_MAX_MB, max_dias: float = USGS_CACHE_MAX_DIAS):
+    # Remove entradas mais antigas que max_dias e, depois, as menos usadas (LRU) até caber em max_mb
+    with _lock_cache:
+        indice = carregar_indice_cache(cache_dir)
+        limite_idade = time.time() - max_dias * 86400
+        indice = {chave: entrada for chave, entrada in indice.items() if entrada['ultimo_acesso'] >= limite_idade}
+
+        tamanho_por_blob = {}
+        for entrada in indice.values():
+            blob = caminho_blob(cache_dir, entrada['sha256'])
+            if blob.exists():
+                tamanho_por_blob[entrada['sha256']] = blob.stat().st_size
+
+        # Mantém as entradas mais recentes enquanto couberem no limite
+        max_bytes = max_mb * 1024 * 1024
+        mantidos, total = set(), 0
+        for entrada in sorted(indice.values(), key=lambda e: e['ultimo_acesso'], reverse=True):
+            sha256 = entrada['sha256']
+            if sha256 in mantidos or sha256 not in tamanho_por_blob:
+                continue
+            if total + tamanho_por_blob[sha256] > max_bytes:
+                break
+            mantidos.add(sha256)
+            total += tamanho_por_blob[sha256]
+
+        indice = {chave: entrada for chave, entrada in indice.items() if entrada['sha256'] in mantidos}
+        removidos = 0
+        for blob in (cache_dir / "blobs").glob("*/*.zip"):
+            if blob.stem not in mantidos:
+                blob.unlink()
+                removidos += 1
+        # Downloads interrompidos (.part) que não foram retomados dentro do prazo
+        for parcial in (cache_dir / "tmp").glob("*.part"):
+            if parcial.stat().st_mtime < limite_idade:
+                parcial.unlink()
+                parcial.with_suffix(".json").unlink(missing_ok=True)
+                removidos += 1
+        salvar_indice_cache(indice, cache_dir)
+
+    if removidos:
+        print(f"Cache: {removidos} arquivo(s) removido(s), {total / 1024 / 1024:.1f} MB em uso")
+
+def _caminho_releases(cache_dir: Path) -> Path:
+    return cache_dir / "releases.json"
+
+def salvar_releases(releases: dict, cache_dir: Path = USGS_CACHE_DIR):
+    # Registra o que o último fetch baixou ({ano: item id, título e sha256 de cada ZIP}),
+    # para que transform e run --offline montem os releases só a partir do cache
+    gravar_json(_caminho_releases(cache_dir), {
+        str(ano): {
+            'item_id': release['item_id'],
+            'titulo': release['item'].get('title'),
+            'arquivos': [[file_name, Path(caminho_zip).stem] for file_name, caminho_zip in release['arquivos']],
+        }
+        for ano, release in releases.items()
+    })
+
+def carregar_releases(cache_dir: Path = USGS_CACHE_DIR) -> dict:
+    # Mesmo formato devolvido por baixar_releases; ZIPs que já saíram do cache são ignorados com aviso
+    releases = {}
+    for ano, release in ler_json(_caminho_releases(cache_dir)).items():
+        arquivos = []
+        for file_name, sha256 in release['arquivos']:
+            blob = caminho_blob(cache_dir, sha256)
+            if blob.exists():
+                arquivos.append((file_name, blob))
+            else:
+                print(f"Atenção: {file_name} não está mais no cache, rode o fetch novamente")
+        releases[int(ano)] = {'item_id': release['item_id'], 'item': {'title': release['titulo']}, 'arquivos': arquivos}
+    return releases
@@ -0,0 +1,77 @@
+import argparse
+import functools
+from pathlib import Path
+
+from . import config
+
+# Linha de comando: python -m etl_usgs {fetch,transform,publish,run,ranking} [opções].
+# Os padrões vêm do .env/ambiente (config.py); as opções só sobrescrevem a execução atual
+
+def _formatos(texto: str) -> list:
+    return [formato.strip().lower() for formato in texto.split(",") if formato.strip()]
+
+def criar_parser() -> argparse.ArgumentParser:
+    comum = argparse.ArgumentParser(add_help=False)
+    comum.add_argument("--cache-dir", type=Path, default=config.USGS_CACHE_DIR, help="pasta do cache de ZIPs")
+    comum.add_argument("--relatorio", type=Path, default=config.USGS_RELATORIO, help="JSON com as métricas por etapa")
+    comum.add_argument("--perfil", choices=["cprofile", "pyinstrument"], default=config.USGS_PROFILE or None,
+                       help="executa sob o profiler e grava o perfil ao lado do relatório")
+
+    saidas = argparse.ArgumentParser(add_help=False)
+    saidas.add_argument("--saidas", type=_formatos, default=config.USGS_SAIDAS, help="formatos separados por vírgula")
+    saidas.add_argument("--saida-dir", type=Path, default=config.USGS_SAIDA_DIR, help="pasta local das saídas")
+
+    transformacao = argparse.ArgumentParser(add_help=False)
+    transformacao.add_argument("--processos", type=int, default=config.USGS_MAX_PROCESSOS, help="1 = modo serial")
+    transformacao.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=config.USGS_INCREMENTAL,
+                               help="reprocessa só os ZIPs alterados (requer pyarrow)")
+
+    parser = argparse.ArgumentParser(prog="python -m etl_usgs", description="ETL da produção mineral mundial do USGS para o SharePoint")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("fetch", parents=[comum], help="baixa ou revalida os ZIPs dos releases no cache local")
+    comandos.add_parser("transform", parents=[comum, transformacao, saidas], help="monta a tabela a partir do cache e grava as saídas (sem rede)")
+    comandos.add_parser("publish", parents=[comum, saidas], help="envia as saídas já gravadas para o SharePoint")
+    run = comandos.add_parser("run", parents=[comum, transformacao, saidas], help="fetch + transform + publish")
+    run.add_argument("--offline", action="store_true", help="pula o fetch e usa os releases já no cache")
+
+    ranking = comandos.add_parser("ranking", help="maiores produtores de uma commodity no ano, pelo banco local")
+    ranking.add_argument("commodity", help='nome traduzido, como na tabela (ex.: "Cobre")')
+    ranking.add_argument("ano", type=int)
+    ranking.add_argument("--limite", type=int, default=10, help="posições por tipo (mina, refinaria...)")
+    ranking.add_argument("--banco", type=Path, default=config.USGS_BANCO)
+    return parser
+
+def main(argv: list = None) -> int:
+    args = criar_parser().parse_args(argv)
+
+    if args.comando == "ranking":
+        # Consulta pura: sem relatório de execução nem profiler
+        from .banco import ranking_participacao
+        resultado = ranking_participacao(args.commodity, args.ano, args.limite, args.banco)
+        if resultado.empty:
+            print("Nenhum dado no banco local para essa consulta")
+            return 1
+        print(resultado.to_string(index=False, float_format=lambda valor: f"{valor:,.1f}"))
+        return 0
+
+    # Só o pipeline é importado aqui; cada etapa carrega as próprias dependências
+    from . import pipeline
+
+    if args.comando == "fetch":
+        etapa = functools.partial(pipeline.etapa_fetch, cache_dir=args.cache_dir)
+    elif args.comando == "transform":
+        etapa = lambda: pipeline.etapa_transform(
+            cache_dir=args.cache_dir, max_processos=args.processos, incremental=args.incremental,
+            formatos=args.saidas, saida_dir=args.saida_dir,
+        )[0] is not None
+    elif args.comando == "publish":
+        etapa = functools.partial(pipeline.etapa_publish, formatos=args.saidas, saida_dir=args.saida_dir)
+    else:
+        etapa = functools.partial(
+            pipeline.main, offline=args.offline, cache_dir=args.cache_dir, max_processos=args.processos,
+            incremental=args.incremental, formatos=args.saidas, saida_dir=args.saida_dir,
+        )
+
+    # Código 1 para o agendador: fetch sem nenhum release, transform sem nada no cache, publish/run com falha
+    resultado = pipeline.executar_com_relatorio(etapa, args.perfil, args.relatorio)
+    return 0 if resultado else 1
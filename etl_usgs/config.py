@@ -0,0 +1,95 @@
+import os
+import re
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Carrega as variáveis do arquivo .env para o ambiente da sessão
+load_dotenv()
+
+
+# CARREGA AS VARIÁVEIS A PARTIR DO ARQUIVO .ENV
+
+TENANT_ID = os.getenv("TENANT_ID") 
+CLIENT_ID = os.getenv("CLIENT_ID")
+CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+USERNAME = os.getenv("username_microsoft")
+PASSWORD = os.getenv("password_microsoft")
+SHAREPOINT_URL = os.getenv("SHAREPOINT_URL_RAIZ")
+SHAREPOINT_SITE = os.getenv("SHAREPOINT_SITE")
+SHAREPOINT_PASTA = os.getenv("SHAREPOINT_PASTA")
+SHAREPOINT_DOC = os.getenv("SHAREPOINT_DOC") 
+
+# Paralelismo dos downloads (threads no total e conexões simultâneas por host)
+USGS_MAX_DOWNLOADS = int(os.getenv("USGS_MAX_DOWNLOADS", "8"))
+USGS_MAX_DOWNLOADS_POR_HOST = int(os.getenv("USGS_MAX_DOWNLOADS_POR_HOST", "4"))
+
+def _lista_anos(texto: str) -> list:
+    # "2020,2021,2022" ou "2020-2022" (intervalos inclusivos, podem ser combinados com vírgula)
+    anos = []
+    for parte in re.split(r"[,\s]+", texto.strip()):
+        if "-" in parte:
+            inicio, fim = parte.split("-", 1)
+            anos.extend(range(int(inicio), int(fim) + 1))
+        elif parte:
+            anos.append(int(parte))
+    return anos
+
+# Janelas de anos mantidas de cada layout de CSV (releases antigos e release 2025 em diante)
+USGS_ANOS_LEGADO = _lista_anos(os.getenv("USGS_ANOS_LEGADO") or "2020-2022")
+USGS_ANOS_2025 = _lista_anos(os.getenv("USGS_ANOS_2025") or "2023-2024")
+
+# Commodities processadas (abreviação do MCS, nome em inglês ou tradução, separados por vírgula); vazio = todas as mapeadas
+USGS_COMMODITIES = [nome.strip() for nome in (os.getenv("USGS_COMMODITIES") or "").split(",") if nome.strip()]
+
+# Processos usados na leitura/transformação dos CSVs (1 = modo serial)
+USGS_MAX_PROCESSOS = int(os.getenv("USGS_MAX_PROCESSOS") or "1")
+
+# Cache local dos ZIPs do ScienceBase (limite em MB e idade máxima em dias para o LRU)
+USGS_CACHE_DIR = Path(os.getenv("USGS_CACHE_DIR") or ".cache_usgs")
+USGS_CACHE_MAX_MB = float(os.getenv("USGS_CACHE_MAX_MB") or "2048")
+USGS_CACHE_MAX_DIAS = float(os.getenv("USGS_CACHE_MAX_DIAS") or "365")
+
+# Tamanho dos blocos lidos da rede durante o download (bytes)
+USGS_TAMANHO_BLOCO = int(os.getenv("USGS_TAMANHO_BLOCO") or str(1024 * 1024))
+
+# Rede do ScienceBase: timeouts de conexão/leitura (s), tentativas por requisição com espera exponencial
+# aleatória limitada a USGS_ESPERA_MAX (s) e circuito por host: após USGS_CIRCUITO_FALHAS falhas seguidas
+# as requisições ao host falham na hora durante USGS_CIRCUITO_ESPERA segundos
+USGS_SCIENCEBASE_URL = os.getenv("USGS_SCIENCEBASE_URL") or "https://www.sciencebase.gov/catalog/item/{}"
+USGS_TIMEOUT_CONEXAO = float(os.getenv("USGS_TIMEOUT_CONEXAO") or "10")
+USGS_TIMEOUT_LEITURA = float(os.getenv("USGS_TIMEOUT_LEITURA") or "60")
+USGS_TENTATIVAS = int(os.getenv("USGS_TENTATIVAS") or "5")
+USGS_ESPERA_MAX = float(os.getenv("USGS_ESPERA_MAX") or "30")
+USGS_CIRCUITO_FALHAS = int(os.getenv("USGS_CIRCUITO_FALHAS") or "5")
+USGS_CIRCUITO_ESPERA = float(os.getenv("USGS_CIRCUITO_ESPERA") or "60")
+
+# Atualização incremental: manifesto dos ZIPs já processados + tabela longa em Parquet (requer pyarrow)
+USGS_INCREMENTAL = (os.getenv("USGS_INCREMENTAL") or "0").lower() in ("1", "true", "sim")
+USGS_DADOS_DIR = Path(os.getenv("USGS_DADOS_DIR") or "dados_usgs")
+
+# Banco SQLite local com a tabela final (upsert a cada transform), para consultas sem rodar o ETL
+USGS_BANCO = Path(os.getenv("USGS_BANCO") or USGS_DADOS_DIR / "producao.sqlite")
+
+# Formatos gerados ao final (excel, parquet, arrow, csv.gz; separados por vírgula) e pasta local das saídas
+USGS_SAIDAS = [formato.strip().lower() for formato in (os.getenv("USGS_SAIDAS") or "excel").split(",") if formato.strip()]
+USGS_SAIDA_DIR = Path(os.getenv("USGS_SAIDA_DIR") or "saida_usgs")
+
+# Upload em blocos para o SharePoint (tamanho do bloco, arredondado para múltiplo de 320 KiB; tentativas por bloco
+# e timeout de cada requisição)
+USGS_UPLOAD_BLOCO_MB = int(os.getenv("USGS_UPLOAD_BLOCO_MB") or "10")
+USGS_UPLOAD_TENTATIVAS = int(os.getenv("USGS_UPLOAD_TENTATIVAS") or "5")
+USGS_UPLOAD_TIMEOUT = float(os.getenv("USGS_UPLOAD_TIMEOUT") or "120")
+
+# Relatório da execução (JSON com tempo, bytes, linhas e memória por etapa) e profiling opcional
+# (USGS_PROFILE=cprofile ou pyinstrument; o perfil é gravado na pasta de saídas)
+USGS_RELATORIO = Path(os.getenv("USGS_RELATORIO") or USGS_SAIDA_DIR / "relatorio_execucao.json")
+USGS_PROFILE = (os.getenv("USGS_PROFILE") or "").lower()
+# Pico de memória alocada por etapa via tracemalloc; desligado por padrão porque deixa o parse ~3x mais lento
+USGS_MEDIR_MEMORIA = (os.getenv("USGS_MEDIR_MEMORIA") or "0").lower() in ("1", "true", "sim")
+
+# Nome (sem extensão) dos arquivos de saída publicados no SharePoint
+USGS_NOME_SAIDA = os.getenv("USGS_NOME_SAIDA") or "TESTE2ProdUSGS20-24"
+
+# Caminho do cache de tokens criptografado em disco (opcional; sem ele o cache fica só em memória)
+USGS_TOKEN_CACHE = os.getenv("USGS_TOKEN_CACHE")
@@ -0,0 +1,96 @@
+import time
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # o modo incremental requer pyarrow (ver etapa_transform)
+    pa = pq = None
+
+from .config import USGS_DADOS_DIR, USGS_MAX_PROCESSOS
+from .cache import ler_json, gravar_json, chave_cache
+from .instrumentacao import medir_etapa
+from .transformacao import COLUNAS_TABELA, aplicar_esquema, assinatura_processamento, concatenar_tabelas, executar_tarefas, listar_tarefas
+
+# Atualização incremental: manifesto dos ZIPs já processados + tabela longa em Parquet particionada por Ano/Commodity
+
+def _caminho_manifesto(dados_dir: Path) -> Path:
+    return dados_dir / "manifesto.json"
+
+def _caminho_tabela(dados_dir: Path) -> Path:
+    return dados_dir / "tabela"
+
+def _id_delta(chave: str) -> str:
+    # Nome estável dos arquivos Parquet gerados a partir de um ZIP (item id + nome do arquivo)
+    return hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+
+def remover_delta(dados_dir: Path, chave: str):
+    for arquivo in _caminho_tabela(dados_dir).glob(f"**/{_id_delta(chave)}-*.parquet"):
+        arquivo.unlink()
+
+def gravar_delta(df: pd.DataFrame, dados_dir: Path, chave: str):
+    # Substitui as linhas de um ZIP na tabela particionada por Ano/Commodity
+    remover_delta(dados_dir, chave)
+    if df.empty:
+        return
+    tabela = pa.Table.from_pandas(aplicar_esquema(df), preserve_index=False)
+    pq.write_to_dataset(
+        tabela,
+        root_path=str(_caminho_tabela(dados_dir)),
+        partition_cols=['Ano', 'Commodity'],
+        basename_template=f"{_id_delta(chave)}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+def ler_tabela_materializada(dados_dir: Path) -> pd.DataFrame:
+    caminho = _caminho_tabela(dados_dir)
+    if not any(caminho.glob("**/*.parquet")):
+        return aplicar_esquema(pd.DataFrame(columns=COLUNAS_TABELA))
+    df = aplicar_esquema(pq.read_table(str(caminho), partitioning="hive").to_pandas())
+    return df.sort_values(['Ano', 'Commodity'], kind="stable", ignore_index=True)
+
+def atualizar_incremental(releases: dict, dados_dir: Path = USGS_DADOS_DIR, max_processos: int = USGS_MAX_PROCESSOS) -> tuple:
+    # Reprocessa apenas os ZIPs novos ou alterados (o sha256 do arquivo no cache mudou, ou a seleção
+    # de anos/commodities ou o esquema não são os mesmos usados no processamento anterior),
+    # grava o delta na tabela particionada e remove os ZIPs que deixaram de existir.
+    # Retorna (tabela completa, houve alteração)
+    manifesto = ler_json(_caminho_manifesto(dados_dir))
+    processamento = assinatura_processamento()
+
+    atuais = {}
+    alterados = {}
+    for ano, release in releases.items():
+        for file_name, caminho_zip in release['arquivos']:
+            chave = chave_cache(release['item_id'], file_name)
+            # O ZIP do cache é nomeado pelo próprio sha256 do conteúdo
+            sha256 = Path(caminho_zip).stem
+            atuais[chave] = sha256
+            anterior = manifesto.get(chave, {})
+            if anterior.get('sha256') != sha256 or anterior.get('processamento') != processamento:
+                alterados.setdefault(ano, {**release, 'arquivos': []})['arquivos'].append((file_name, caminho_zip))
+
+    removidos = [chave for chave in manifesto if chave not in atuais]
+    for chave in removidos:
+        print(f"Incremental: {chave} não existe mais, removendo suas linhas")
+        remover_delta(dados_dir, chave)
+        del manifesto[chave]
+
+    if alterados:
+        with medir_etapa("transformacao", processos=max_processos):
+            resultados = executar_tarefas(listar_tarefas(alterados), max_processos)
+        for ano, release in alterados.items():
+            for file_name, caminho_zip in release['arquivos']:
+                chave = chave_cache(release['item_id'], file_name)
+                dfs = [df_long for tarefa, df_long in resultados if tarefa[0] == str(caminho_zip)]
+                print(f"Incremental: reprocessado {chave}")
+                gravar_delta(concatenar_tabelas(dfs), dados_dir, chave)
+                manifesto[chave] = {'sha256': atuais[chave], 'processamento': processamento, 'ano_release': ano, 'processado_em': time.time()}
+        gravar_json(_caminho_manifesto(dados_dir), manifesto)
+    elif removidos:
+        gravar_json(_caminho_manifesto(dados_dir), manifesto)
+    else:
+        print("Incremental: nenhum release alterado")
+
+    return ler_tabela_materializada(dados_dir), bool(alterados or removidos)
@@ -0,0 +1,112 @@
+import sys
+import json
+import time
+import threading
+import contextlib
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # não existe no Windows; o relatório sai sem o pico de memória
+    resource = None
+
+from .config import USGS_RELATORIO, USGS_MEDIR_MEMORIA
+
+# Instrumentação: cada etapa registra tempo, bytes, linhas de entrada/saída e, com USGS_MEDIR_MEMORIA,
+# o pico de memória alocada durante ela
+
+_registros_etapas = []
+_lock_registros = threading.Lock()
+
+def memoria_rss_pico_mb():
+    # Pico de memória residente do processo inteiro até agora (ru_maxrss é KB no Linux e bytes no macOS);
+    # só cresce, por isso vai no relatório geral e não por etapa
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+# Medições de memória abertas: {id: {'inicio': bytes alocados na abertura, 'pico': maior valor visto}}.
+# O tracemalloc tem um único pico por processo; a cada abertura/fechamento o pico é repassado a todas as
+# medições abertas e zerado, então etapas aninhadas funcionam e etapas simultâneas (threads) dividem o intervalo
+_medicoes = {}
+_lock_medicoes = threading.Lock()
+
+def _repassar_pico():
+    _, pico = tracemalloc.get_traced_memory()
+    for medicao in _medicoes.values():
+        medicao['pico'] = max(medicao['pico'], pico)
+    tracemalloc.reset_peak()
+
+@contextlib.contextmanager
+def medir_memoria(metricas: dict):
+    # Grava em metricas['memoria_pico_mb'] o pico de memória alocada (Python, NumPy, pandas) durante o bloco,
+    # acima do que já estava alocado no início. Sem USGS_MEDIR_MEMORIA não mede nada
+    if not USGS_MEDIR_MEMORIA:
+        yield metricas
+        return
+    with _lock_medicoes:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _repassar_pico()
+        atual, _ = tracemalloc.get_traced_memory()
+        chave = object()
+        _medicoes[chave] = {'inicio': atual, 'pico': atual}
+    try:
+        yield metricas
+    finally:
+        with _lock_medicoes:
+            _repassar_pico()
+            medicao = _medicoes.pop(chave)
+            if not _medicoes:
+                tracemalloc.stop()
+        metricas['memoria_pico_mb'] = round((medicao['pico'] - medicao['inicio']) / 1024 / 1024, 1)
+
+def registrar_etapa(metricas: dict):
+    with _lock_registros:
+        _registros_etapas.append(metricas)
+
+@contextlib.contextmanager
+def medir_etapa(etapa: str, **detalhes):
+    # Uso: with medir_etapa("download", arquivo=nome) as metricas: ...; metricas['bytes'] = n
+    metricas = {'etapa': etapa, **detalhes}
+    inicio = time.perf_counter()
+    try:
+        with medir_memoria(metricas):
+            yield metricas
+    except Exception as e:
+        metricas['erro'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        metricas['segundos'] = round(time.perf_counter() - inicio, 4)
+        registrar_etapa(metricas)
+
+def gerar_relatorio_execucao(caminho: Path = USGS_RELATORIO) -> dict:
+    # Consolida os registros por etapa, grava o JSON e imprime um resumo
+    with _lock_registros:
+        registros = list(_registros_etapas)
+
+    resumo = {}
+    for registro in registros:
+        etapa = resumo.setdefault(registro['etapa'], {'execucoes': 0, 'segundos': 0.0, 'bytes': 0, 'linhas_entrada': 0, 'linhas_saida': 0, 'memoria_pico_mb': None, 'erros': 0})
+        etapa['execucoes'] += 1
+        etapa['segundos'] = round(etapa['segundos'] + registro['segundos'], 4)
+        for campo in ('bytes', 'linhas_entrada', 'linhas_saida'):
+            etapa[campo] += registro.get(campo) or 0
+        if registro.get('memoria_pico_mb') is not None:
+            etapa['memoria_pico_mb'] = max(etapa['memoria_pico_mb'] or 0, registro['memoria_pico_mb'])
+        etapa['erros'] += 'erro' in registro
+
+    relatorio = {'gerado_em': time.strftime("%Y-%m-%dT%H:%M:%S"), 'memoria_rss_pico_mb': memoria_rss_pico_mb(), 'etapas': resumo, 'registros': registros}
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print("\nRELATÓRIO DA EXECUÇÃO")
+    for nome, etapa in resumo.items():
+        pico = f" pico {etapa['memoria_pico_mb']} MB" if etapa['memoria_pico_mb'] is not None else ""
+        print(f"   {nome:<14} {etapa['execucoes']:>4}x {etapa['segundos']:>9.2f}s {etapa['bytes'] / 1024 / 1024:>9.1f} MB "
+              f"{etapa['linhas_entrada']:>9} -> {etapa['linhas_saida']:<9}{pico}".rstrip())
+    print(f"   Pico de memória residente do processo: {relatorio['memoria_rss_pico_mb']} MB")
+    print(f"   Relatório gravado em {caminho}")
+    return relatorio
@@ -0,0 +1,126 @@
+# IDs dos releases ScienceBase e mapas de tradução (inglês -> português)
+
+sciencebase_ids = {
+    2022 : '6197ccbed34eb622f692ee1c', 
+    2023 : '63b5f411d34e92aad3caa57f',
+    2024 : '65a6e45fd34e5af967a46749', 
+    2025 : '677eaf95d34e760b392c4970'  
+}
+
+
+mapa_paises = {
+    "argentina": "Argentina",
+    "australia": "Austrália",
+    "austria": "Áustria",
+    "bahrain": "Bahrein",
+    "bhutan": "Butão",
+    "bolivia": "Bolívia",
+    "brazil": "Brasil",
+    "burma": "Mianmar",
+    "burundi": "Burundi",
+    "canada": "Canadá",
+    "chile": "Chile",
+    "china": "China",
+    "congo (kinshasa)": "República Democrática do Congo",
+    "cuba": "Cuba",
+    "côte d’ivoire": "Costa do Marfim",
+    "finland": "Finlândia",
+    "france": "França",
+    "gabon": "Gabão",
+    "georgia": "Geórgia",
+    "germany": "Alemanha",
+    "ghana": "Gana",
+    "greenland": "Groenlândia",
+    "iceland": "Islândia",
+    "india": "Índia",
+    "indonesia": "Indonésia",
+    "iran": "Irã",
+    "japan": "Japão",
+    "kazakhstan": "Cazaquistão",
+    "kazakhstan, concentrate": "Cazaquistão (concentrado)",
+    "kenya": "Quênia",
+    "korea, north": "Coreia do Norte",
+    "korea, republic of": "Coreia do Sul",
+    "laos": "Laos",
+    "madagascar": "Madagáscar",
+    "malaysia": "Malásia",
+    "mexico": "México",
+    "morocco": "Marrocos",
+    "mozambique": "Moçambique",
+    "new caledonia": "Nova Caledônia",
+    "new caledonia (overseas territory of france)": "Nova Caledônia",
+    "nigeria": "Nigéria",
+    "norway": "Noruega",
+    "other countries": "Outros países",
+    "papua new guinea": "Papua-Nova Guiné",
+    "peru": "Peru",
+    "philippines": "Filipinas",
+    "poland": "Polônia",
+    "portugal": "Portugal",
+    "russia": "Rússia",
+    "rwanda": "Ruanda",
+    "sierra leone": "Serra Leoa",
+    "south africa": "África do Sul",
+    "spain": "Espanha",
+    "sri lanka": "Sri Lanka",
+    "sweden": "Suécia",
+    "tajikistan": "Tajiquistão",
+    "tanzania": "Tanzânia",
+    "thailand": "Tailândia",
+    "turkey": "Turquia",
+    "ukraine": "Ucrânia",
+    "ukraine, concentrate": "Ucrânia (concentrado)",
+    "united arab emirates": "Emirados Árabes Unidos",
+    "united states": "Estados Unidos",
+    "uzbekistan": "Uzbequistão",
+    "vietnam": "Vietnã",
+    "world total (rounded)": "Total mundial (arredondado)",
+    "world total (rounded), excluding u.s. production": "Total mundial (arredondado, excluindo produção EUA)",
+    "zambia": "Zâmbia",
+    "zimbabwe": "Zimbábue",
+    "null": 'null',
+    "namibia" : "Namíbia",
+}
+
+mapa_commodities = {
+    "alumi": "Alumínio",
+    "chrom": "Cromo",
+    "cobal": "Cobalto",
+    "coppe": "Cobre",
+    "tin": "Estanho",
+    "graph": "Grafite",
+    "lead": "Chumbo",
+    "lithi": "Lítio",
+    "mgmet": "Magnésio",
+    "manga": "Manganês",
+    "molyb": "Molibdênio",
+    "niobi": "Nióbio",
+    "nicke": "Níquel",
+    "simet": "Silício",
+    "raree": "Terras Raras",
+    "timin": "Titânio", 
+    "vanad": "Vanádio",
+    "zinc": "Zinco",
+
+}
+mapa_commodities_2025 = {
+#Commodities nos arquivos de 2025 (só as chaves deste mapa são mantidas; espaços e caixa não importam)
+    "Aluminum": "Alumínio", 
+    "Chromium" : "Cromo", 
+    "Lead" : "Chumbo" ,
+    "Cobalt": "Cobalto",
+    "Copper ": "Cobre",
+    "Tin": "Estanho",
+    "Graphite": "Grafite",
+    "Lithium ": "Lítio",
+    "Magnesium metal" : "Magnésio",
+    "Manganese": "Manganês", 
+    "Molybdenum " : "Molibdênio",
+    "Niobium": "Nióbio",
+    "Nickel": "Níquel",
+    "Silicon": "Silício",
+    "Rare earths": "Terras Raras", 
+    "Titanium Mineral Concentrates" : "Titânio",
+    "Vanadium": "Vanádio",
+    "Zinc": "Zinco"
+}
@@ -0,0 +1,66 @@
+import re
+import functools
+import unicodedata
+import numpy as np
+import pandas as pd
+
+from .config import USGS_COMMODITIES
+from .mapas import mapa_paises, mapa_commodities, mapa_commodities_2025
+
+@functools.lru_cache(maxsize=None)
+def canonizar_nome(nome: str) -> str:
+    # Forma canônica usada nas buscas: NFKC (NBSP vira espaço), minúsculas, sem o número
+    # de nota de rodapé no final ("india9", "new caledonia11") e com espaços colapsados
+    nome = unicodedata.normalize("NFKC", nome).lower().strip()
+    nome = re.sub(r"\d+$", "", nome)
+    return re.sub(r"\s+", " ", nome).strip()
+
+def montar_normalizador(mapa: dict) -> dict:
+    # Dicionário pré-compilado {nome canônico: valor}; variantes de rodapé/espaço não precisam de entrada própria
+    return {canonizar_nome(chave): valor for chave, valor in mapa.items()}
+
+def traduzir_selecao(selecao: list) -> set:
+    # Converte cada item da seleção (abreviação do layout antigo, nome em inglês do 2025 ou a tradução)
+    # na tradução canônica, consultando os dois mapas; assim a seleção vale igual para todos os layouts.
+    # Seleção vazia devolve None (todas as commodities)
+    if not selecao:
+        return None
+    traducoes = {}
+    for mapa in (mapa_commodities, mapa_commodities_2025):
+        for chave, valor in mapa.items():
+            traducoes[canonizar_nome(chave)] = canonizar_nome(valor)
+            traducoes[canonizar_nome(valor)] = canonizar_nome(valor)
+    sem_correspondencia = [nome for nome in selecao if canonizar_nome(nome) not in traducoes]
+    if sem_correspondencia:
+        print(f"Atenção: {len(sem_correspondencia)} commodity(ies) de USGS_COMMODITIES sem correspondência nos mapas: {sem_correspondencia}")
+    return {traducoes[canonizar_nome(nome)] for nome in selecao if canonizar_nome(nome) in traducoes}
+
+def selecionar_commodities(mapa: dict, traduzidas: set) -> dict:
+    # Restringe um mapa de commodities às traduções selecionadas (ver traduzir_selecao); None mantém o mapa inteiro
+    if traduzidas is None:
+        return dict(mapa)
+    return {chave: valor for chave, valor in mapa.items() if canonizar_nome(valor) in traduzidas}
+
+normalizador_paises = montar_normalizador(mapa_paises)
+commodities_selecionadas = traduzir_selecao(USGS_COMMODITIES)
+normalizador_commodities_2025 = montar_normalizador(selecionar_commodities(mapa_commodities_2025, commodities_selecionadas))
+
+def normalizar_nomes(serie: pd.Series, normalizador: dict, manter_original: bool = True) -> pd.Series:
+    # Resolve cada valor distinto uma única vez (sobre as categorias) e espalha o resultado pelos códigos.
+    # Sem correspondência: mantém o texto original (manter_original) ou devolve nulo
+    categorica = pd.Categorical(serie)
+    categorias = categorica.categories
+    resolvidos = [normalizador.get(canonizar_nome(str(nome))) for nome in categorias]
+    if manter_original:
+        resolvidos = [valor if valor is not None else nome for nome, valor in zip(categorias, resolvidos)]
+    # Código -1 (nulo) aponta para o None acrescentado no final
+    tabela = np.array(resolvidos + [None], dtype=object)
+    return pd.Series(tabela[categorica.codes], index=serie.index)
+
+def nomes_nao_mapeados(serie: pd.Series, normalizador: dict) -> list:
+    # Valores distintos que não correspondem a nenhuma chave nem a nenhum valor já traduzido do normalizador
+    traduzidos = set(normalizador.values())
+    return sorted(
+        nome for nome in pd.unique(serie.dropna())
+        if nome not in traduzidos and canonizar_nome(str(nome)) not in normalizador
+    )
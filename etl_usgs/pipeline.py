@@ -0,0 +1,199 @@
+from pathlib import Path
+
+from .config import (
+    SHAREPOINT_URL, SHAREPOINT_SITE, SHAREPOINT_PASTA, USGS_CACHE_DIR, USGS_MAX_PROCESSOS, USGS_INCREMENTAL,
+    USGS_DADOS_DIR, USGS_BANCO, USGS_SAIDAS, USGS_SAIDA_DIR, USGS_NOME_SAIDA, USGS_RELATORIO, USGS_PROFILE,
+)
+from .instrumentacao import medir_etapa, gerar_relatorio_execucao
+
+# Etapas do pipeline. Cada uma importa só o que usa: fetch não carrega o msal, transform trabalha sobre
+# o cache local sem rede nem autenticação (e atualiza o banco local) e publish só envia as saídas já gravadas em disco
+
+def etapa_fetch(ids_releases: dict = None, cache_dir: Path = USGS_CACHE_DIR) -> dict:
+    # Baixa (ou revalida) os ZIPs world de cada release e registra no cache o que foi baixado.
+    # Releases que falharam ficam de fora (ou na versão do último fetch), sem interromper os demais
+    from .mapas import sciencebase_ids
+    from .rede import criar_sessao_http, baixar_releases
+    from .cache import salvar_releases
+    from .transformacao import membros_ausentes, arquivos_desejados, releases_sem_layout
+
+    ids_releases = ids_releases or sciencebase_ids
+    releases_sem_layout(ids_releases)
+    releases = baixar_releases(criar_sessao_http(), ids_releases, cache_dir=cache_dir)
+    salvar_releases(releases, cache_dir)
+
+    for ano, release in releases.items():
+        print(f"\nRELEASE: {release['item']['title']}")
+        for file_name, caminho_zip in release['arquivos']:
+            ausentes = membros_ausentes(caminho_zip, arquivos_desejados, ano)
+            if ausentes:
+                print(f"Atenção: {len(ausentes)} arquivo(s) esperado(s) ausente(s) em {file_name}: {ausentes}")
+
+    return releases
+
+def etapa_transform(releases: dict = None, cache_dir: Path = USGS_CACHE_DIR, max_processos: int = USGS_MAX_PROCESSOS, incremental: bool = USGS_INCREMENTAL, formatos: list = USGS_SAIDAS, saida_dir: Path = USGS_SAIDA_DIR, nome_base: str = USGS_NOME_SAIDA) -> tuple:
+    # Monta a tabela longa a partir dos ZIPs do cache (os do último fetch, se releases não for passado)
+    # e grava o banco e as saídas locais que estiverem ausentes ou atrás da tabela atual.
+    # Retorna (caminhos das saídas pedidas, houve regravação); caminhos é None quando não há
+    # o que transformar (cache sem releases, tabela vazia), que é falha
+    from .cache import carregar_releases, limpar_cache
+    from .normalizacao import nomes_nao_mapeados, normalizador_paises
+    from .saidas import gravar_saidas, caminhos_saidas, versao_tabela, ler_estado_saidas, gravar_estado_saidas, saida_atualizada, registrar_gravacao
+    from .transformacao import FORMATO_2025, executar_tarefas, listar_tarefas, concatenar_tabelas, reconciliar_releases, relatorio_memoria
+    from .incremental import atualizar_incremental, pa
+    from .banco import gravar_banco
+
+    if releases is None:
+        releases = carregar_releases(cache_dir)
+    if not releases:
+        print("Nenhum release no cache, rode o fetch primeiro")
+        return None, False
+
+    if incremental and pa is None:
+        print("Atenção: modo incremental requer pyarrow, executando a carga completa")
+
+    if incremental and pa is not None:
+        tabela_completa, _ = atualizar_incremental(releases, USGS_DADOS_DIR, max_processos)
+    else:
+        # Cada (ZIP, CSV) vira uma tarefa; em modo paralelo os CSVs são lidos em processos separados.
+        # As tarefas já vêm ordenadas: releases antigos primeiro, depois o 2025
+        print(f"\nPROCESSANDO {len(releases)} RELEASES ({max_processos} processo(s))")
+        with medir_etapa("transformacao", processos=max_processos):
+            resultados = executar_tarefas(listar_tarefas(releases), max_processos)
+        if not any(tarefa[2] == FORMATO_2025 for tarefa, _ in resultados):
+            print("Nenhum dado foi processado para 2025.")
+
+        # Concatenar todos os DataFrames (de releases antigos e 2025)
+        with medir_etapa("concat", linhas_entrada=sum(len(df_long) for _, df_long in resultados)) as metricas:
+            tabela_completa = concatenar_tabelas([df_long for _, df_long in resultados])
+            metricas['linhas_saida'] = len(tabela_completa)
+
+    # Um valor por (país, commodity, ano) entre os releases sobrepostos, com a origem registrada
+    with medir_etapa("reconciliacao", linhas_entrada=len(tabela_completa)) as metricas:
+        tabela_completa = reconciliar_releases(tabela_completa)
+        metricas['linhas_saida'] = len(tabela_completa)
+
+    # Com os ZIPs já processados, aplica a política de expiração/LRU do cache
+    limpar_cache(cache_dir)
+
+    relatorio_memoria(tabela_completa)
+
+    nao_mapeados = nomes_nao_mapeados(tabela_completa['Country'], normalizador_paises)
+    if nao_mapeados:
+        print(f"Atenção: {len(nao_mapeados)} país(es) sem tradução em mapa_paises: {nao_mapeados}")
+
+    if tabela_completa.empty:
+        print("O DataFrame fornecido está vazio.")
+        return None, False
+
+    # O manifesto incremental diz quais ZIPs mudaram; já banco e saídas são comparados um a um com a
+    # versão da tabela, para que um formato novo, outra pasta ou um arquivo apagado sejam (re)gravados
+    versao = versao_tabela(tabela_completa)
+    estado = ler_estado_saidas(USGS_DADOS_DIR)
+    regravou = False
+
+    if saida_atualizada(estado, USGS_BANCO, versao):
+        print("Banco local já está na versão atual da tabela")
+    else:
+        with medir_etapa("banco", linhas_entrada=len(tabela_completa)) as metricas:
+            metricas['linhas_saida'] = gravar_banco(tabela_completa, USGS_BANCO)
+        registrar_gravacao(estado, USGS_BANCO, versao)
+        regravou = True
+
+    caminhos = caminhos_saidas(nome_base, formatos, saida_dir)
+    pendentes = [formato for formato, caminho in caminhos.items() if not saida_atualizada(estado, caminho, versao)]
+    if pendentes:
+        for caminho in gravar_saidas(tabela_completa, nome_base, pendentes, saida_dir):
+            registrar_gravacao(estado, caminho, versao)
+        regravou = True
+    else:
+        print("Nada mudou desde a última execução, saídas mantidas")
+    gravar_estado_saidas(estado, USGS_DADOS_DIR)
+
+    return list(caminhos.values()), regravou
+
+def etapa_publish(caminhos: list = None, formatos: list = USGS_SAIDAS, saida_dir: Path = USGS_SAIDA_DIR, nome_base: str = USGS_NOME_SAIDA) -> bool:
+    # Envia as saídas para o SharePoint; sem caminhos, publica as já gravadas em saida_dir
+    from .autenticacao import get_acesstoken
+    from .sharepoint import upload_arquivo_para_sharepoint
+    from .saidas import saidas, registrar_publicacao
+
+    if caminhos is None:
+        caminhos = [saida_dir / f"{nome_base}{saidas[formato][0]}" for formato in formatos if formato in saidas]
+        caminhos = [caminho for caminho in caminhos if caminho.exists()]
+    if not caminhos:
+        print(f"Nenhuma saída encontrada em {saida_dir}, rode o transform primeiro")
+        return False
+
+    enviados = True
+    for caminho in caminhos:
+        # Vem do cache na maior parte das vezes; renovado se expirou durante um upload longo
+        token = get_acesstoken()
+        if not token:
+            print('Codigo de autenticação faltando')
+            return False
+        with medir_etapa("upload", arquivo=caminho.name, bytes=caminho.stat().st_size):
+            enviado = upload_arquivo_para_sharepoint(
+                access_token=token,
+                sharepoint_url=SHAREPOINT_URL,
+                sharepoint_site=SHAREPOINT_SITE,
+                pasta_destino=SHAREPOINT_PASTA,
+                nome_arquivo=caminho.name,
+                conteudo=caminho
+            )
+        # O marcador de publicação só avança depois do envio confirmado; um envio que falhou é repetido no próximo run
+        if enviado:
+            registrar_publicacao(caminho, USGS_DADOS_DIR)
+        enviados &= enviado
+    return enviados
+
+def main(offline: bool = False, **opcoes) -> bool:
+    # Pipeline completo: fetch -> transform -> publish. Só são enviadas as saídas cuja versão em disco
+    # ainda não foi publicada com sucesso (o upload é dispensado quando todas já foram).
+    # Com offline=True usa os releases do último fetch, sem acessar o ScienceBase
+    from .saidas import saidas_nao_publicadas
+
+    cache_dir = opcoes.pop('cache_dir', USGS_CACHE_DIR)
+    releases = None if offline else etapa_fetch(cache_dir=cache_dir)
+    if releases is not None and not releases:
+        print("❌ Nenhum release disponível, execução interrompida")
+        return False
+    caminhos, _ = etapa_transform(releases, cache_dir=cache_dir, **opcoes)
+    if caminhos is None:
+        return False
+    pendentes = saidas_nao_publicadas(caminhos, USGS_DADOS_DIR)
+    if not pendentes:
+        print("Upload dispensado: saídas já publicadas")
+        return True
+    return etapa_publish(pendentes)
+
+def executar_com_relatorio(etapa=main, perfil: str = USGS_PROFILE, relatorio: Path = USGS_RELATORIO):
+    # Roda a etapa (opcionalmente sob cProfile ou pyinstrument) e grava o relatório de etapas
+    # mesmo quando a execução termina em erro
+    destino_perfil = relatorio.parent
+    try:
+        if perfil == "cprofile":
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(etapa)
+            finally:
+                destino_perfil.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(destino_perfil / "perfil.prof")
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+        elif perfil == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return etapa()
+            finally:
+                profiler.stop()
+                destino_perfil.mkdir(parents=True, exist_ok=True)
+                (destino_perfil / "perfil.html").write_text(profiler.output_html(), encoding="utf-8")
+                print(profiler.output_text(unicode=True))
+        else:
+            return etapa()
+    finally:
+        gerar_relatorio_execucao(relatorio)
@@ -0,0 +1,302 @@
+import time
+import random
+import hashlib
+import threading
+import urllib.parse
+import requests
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    USGS_MAX_DOWNLOADS, USGS_MAX_DOWNLOADS_POR_HOST, USGS_CACHE_DIR, USGS_TAMANHO_BLOCO, USGS_SCIENCEBASE_URL,
+    USGS_TIMEOUT_CONEXAO, USGS_TIMEOUT_LEITURA, USGS_TENTATIVAS, USGS_ESPERA_MAX, USGS_CIRCUITO_FALHAS, USGS_CIRCUITO_ESPERA,
+)
+from .instrumentacao import medir_etapa
+from .cache import (
+    ler_json, gravar_json, chave_cache, caminho_blob, versao_remota, entrada_cache_valida, ler_entrada_cache,
+    gravar_entrada_cache, registrar_acesso_cache, carregar_releases,
+)
+
+# URL da API JSON do catálogo ScienceBase (mesmo endpoint usado pelo sciencebasepy); configurável
+# para apontar os testes para um servidor local
+SCIENCEBASE_ITEM_URL = USGS_SCIENCEBASE_URL
+
+# (conexão, leitura) em segundos; a leitura vale para cada bloco, não para o arquivo inteiro
+TIMEOUT = (USGS_TIMEOUT_CONEXAO, USGS_TIMEOUT_LEITURA)
+
+# Respostas que valem nova tentativa; os demais 4xx são definitivos
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+
+_semaforos_por_host = {}
+_lock_semaforos = threading.Lock()
+
+class ErroRede(Exception):
+    pass
+
+class _FalhaTransitoria(Exception):
+    pass
+
+def criar_sessao_http(max_conexoes: int = USGS_MAX_DOWNLOADS) -> requests.Session:
+    # Uma única sessão com pool de conexões keep-alive, compartilhada por todas as threads
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=max_conexoes, pool_maxsize=max_conexoes)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+def _host(url: str) -> str:
+    return urllib.parse.urlsplit(url).netloc
+
+def _semaforo_do_host(url: str, limite: int) -> threading.BoundedSemaphore:
+    host = _host(url)
+    with _lock_semaforos:
+        if host not in _semaforos_por_host:
+            _semaforos_por_host[host] = threading.BoundedSemaphore(limite)
+        return _semaforos_por_host[host]
+
+# Circuito por host: {host: {'falhas': falhas de conexão seguidas, 'aberto_ate': instante}}.
+# Só falhas de conexão/timeout contam; um 5xx de um item mostra que o host responde e não derruba os outros releases
+_circuitos = {}
+_lock_circuitos = threading.Lock()
+
+def _verificar_circuito(url: str):
+    # Com o circuito aberto a requisição falha na hora, sem ocupar a rede nem esperar retentativas.
+    # Passado o tempo de espera, uma nova tentativa é liberada (se falhar, o circuito reabre)
+    with _lock_circuitos:
+        circuito = _circuitos.get(_host(url))
+        if circuito and circuito['aberto_ate'] > time.monotonic():
+            raise ErroRede(f"circuito aberto para {_host(url)} após {USGS_CIRCUITO_FALHAS} falhas de conexão seguidas")
+
+def _registrar_conexao(url: str, sucesso: bool):
+    with _lock_circuitos:
+        circuito = _circuitos.setdefault(_host(url), {'falhas': 0, 'aberto_ate': 0.0})
+        circuito['falhas'] = 0 if sucesso else circuito['falhas'] + 1
+        if circuito['falhas'] >= USGS_CIRCUITO_FALHAS:
+            circuito['aberto_ate'] = time.monotonic() + USGS_CIRCUITO_ESPERA
+
+def _espera(tentativa: int) -> float:
+    # Espera exponencial com jitter completo (0 a 1s, 0 a 2s, 0 a 4s...), para que as threads não repitam juntas
+    return random.uniform(0, min(USGS_ESPERA_MAX, 2 ** (tentativa - 1)))
+
+def _verificar_status(response: requests.Response):
+    if response.status_code in STATUS_TRANSITORIOS:
+        raise _FalhaTransitoria(f"Status Code {response.status_code}")
+    response.raise_for_status()
+
+def com_retentativas(tentativa_unica, url: str, descricao: str, tentativas: int = USGS_TENTATIVAS):
+    # Executa tentativa_unica() (requisição e leitura do corpo) repetindo em falhas de conexão, timeouts,
+    # corpo interrompido, 429 ou 5xx. Erros definitivos (404, 403...) sobem na primeira vez
+    for tentativa in range(1, tentativas + 1):
+        _verificar_circuito(url)
+        try:
+            resultado = tentativa_unica()
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, _FalhaTransitoria) as e:
+            _registrar_conexao(url, sucesso=isinstance(e, _FalhaTransitoria))
+            if tentativa == tentativas:
+                raise ErroRede(f"{descricao}: {tentativas} tentativas sem sucesso ({e})") from e
+            espera = _espera(tentativa)
+            print(f"   {descricao}: tentativa {tentativa} falhou ({e}), repetindo em {espera:.1f}s...")
+            time.sleep(espera)
+        else:
+            _registrar_conexao(url, sucesso=True)
+            return resultado
+
+def buscar_item_sciencebase(sessao: requests.Session, item_id: str, limite_por_host: int = USGS_MAX_DOWNLOADS_POR_HOST) -> dict:
+    url = SCIENCEBASE_ITEM_URL.format(item_id)
+
+    def buscar():
+        with _semaforo_do_host(url, limite_por_host):
+            response = sessao.get(url, params={"format": "json"}, timeout=TIMEOUT)
+        _verificar_status(response)
+        return response
+
+    with medir_etapa("metadados", item_id=item_id) as metricas:
+        response = com_retentativas(buscar, url, f"metadados {item_id}")
+        metricas['bytes'] = len(response.content)
+        return response.json()
+
+def _baixar_em_blocos(response: requests.Response, destino: Path, tamanho_bloco: int = USGS_TAMANHO_BLOCO, continuar: bool = False) -> tuple:
+    # Grava o corpo da resposta em disco bloco a bloco, calculando o hash no caminho.
+    # Nunca mantém o arquivo inteiro em memória. Com continuar=True acrescenta ao que já está
+    # em destino (resposta 206 de um Range), e o hash cobre o arquivo inteiro
+    sha256 = hashlib.sha256()
+    total = 0
+    if continuar:
+        with open(destino, "rb") as existente:
+            while bloco := existente.read(tamanho_bloco):
+                sha256.update(bloco)
+                total += len(bloco)
+    with open(destino, "ab" if continuar else "wb") as arquivo:
+        for bloco in response.iter_content(chunk_size=tamanho_bloco):
+            arquivo.write(bloco)
+            sha256.update(bloco)
+            total += len(bloco)
+    return sha256.hexdigest(), total
+
+def _caminho_parcial(cache_dir: Path, chave: str) -> Path:
+    # Nome estável por arquivo remoto: um download interrompido continua de onde parou, mesmo em outra execução
+    return cache_dir / "tmp" / f"{hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16]}.part"
+
+def _validador(response: requests.Response):
+    # If-Range só aceita ETag forte ou Last-Modified
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get('Last-Modified')
+
+def _baixar_para_parcial(sessao: requests.Session, url: str, condicionais: dict, parcial: Path, limite_por_host: int, tamanho_esperado: int = None) -> tuple:
+    # Uma tentativa de download. Havendo um .part com validador, pede só o restante (Range + If-Range);
+    # se o arquivo mudou no servidor a resposta vem completa (200) e o .part é reescrito.
+    # Retorna (response, sha256, tamanho total, bytes transferidos) ou (response, None, 0, 0) no 304
+    meta = parcial.with_suffix(".json")
+    offset = parcial.stat().st_size if parcial.exists() else 0
+    validador = ler_json(meta).get('validador') if offset else None
+
+    if offset and validador:
+        headers = {'Range': f"bytes={offset}-", 'If-Range': validador}
+    else:
+        headers, offset = dict(condicionais), 0
+
+    with _semaforo_do_host(url, limite_por_host):
+        with sessao.get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+            if response.status_code == 304:
+                return response, None, 0, 0
+            if response.status_code == 416:
+                # O .part não corresponde mais ao arquivo remoto; recomeça do zero na próxima tentativa
+                parcial.unlink(missing_ok=True)
+                raise _FalhaTransitoria("Range não aceito, reiniciando o download")
+            _verificar_status(response)
+
+            continuar = response.status_code == 206
+            if continuar:
+                print(f"   Retomando {parcial.name} a partir de {offset / 1024 / 1024:.1f} MB")
+            else:
+                offset = 0
+                gravar_json(meta, {'url': url, 'validador': _validador(response)})
+            sha256, total = _baixar_em_blocos(response, parcial, continuar=continuar)
+
+    if tamanho_esperado is not None and total != tamanho_esperado:
+        parcial.unlink(missing_ok=True)
+        raise _FalhaTransitoria(f"{total} bytes recebidos, {tamanho_esperado} esperados")
+    return response, sha256, total, total - offset
+
+def baixar_arquivo_com_cache(sessao: requests.Session, item_id: str, file: dict, cache_dir: Path = USGS_CACHE_DIR, limite_por_host: int = USGS_MAX_DOWNLOADS_POR_HOST, metricas: dict = None) -> Path:
+    # Retorna o caminho do ZIP no cache; o conteúdo é lido sob demanda pelo zipfile.
+    # Se metricas for passado, recebe os bytes transferidos e o resultado do cache
+    metricas = metricas if metricas is not None else {}
+    metricas.update(bytes=0, cache="hit")
+    chave = chave_cache(item_id, file['name'])
+    versao = versao_remota(file)
+
+    entrada = ler_entrada_cache(chave, cache_dir)
+
+    # 1) Checksum/tamanho dos metadados batem com o cache: nenhuma requisição
+    if entrada_cache_valida(entrada, versao, cache_dir):
+        print(f"Cache: {file['name'].lower()} inalterado, download ignorado")
+        registrar_acesso_cache(chave, cache_dir)
+        return caminho_blob(cache_dir, entrada['sha256'])
+
+    # 2) Revalidação condicional com ETag/Last-Modified
+    condicionais = {}
+    if entrada and caminho_blob(cache_dir, entrada['sha256']).exists():
+        if entrada.get('etag'):
+            condicionais['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            condicionais['If-Modified-Since'] = entrada['last_modified']
+
+    print(f"Baixando ZIP: {file['name'].lower()}")
+    parcial = _caminho_parcial(cache_dir, chave)
+    parcial.parent.mkdir(parents=True, exist_ok=True)
+
+    # 3) Download com retentativas; uma falha no meio do corpo deixa o .part para ser retomado
+    transferidos = 0
+
+    def baixar():
+        nonlocal transferidos
+        resultado = _baixar_para_parcial(sessao, file['url'], condicionais, parcial, limite_por_host, versao['size'])
+        transferidos += resultado[3]
+        return resultado
+
+    response, sha256, tamanho, _ = com_retentativas(baixar, file['url'], file['name'].lower())
+    if sha256 is None:
+        print(f"Cache: {file['name'].lower()} revalidado (304), download ignorado")
+        metricas['cache'] = "304"
+        registrar_acesso_cache(chave, cache_dir, versao)
+        return caminho_blob(cache_dir, entrada['sha256'])
+    metricas.update(bytes=transferidos, cache="miss")
+
+    blob = caminho_blob(cache_dir, sha256)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    parcial.replace(blob)
+    parcial.with_suffix(".json").unlink(missing_ok=True)
+
+    gravar_entrada_cache(chave, {
+        'sha256': sha256,
+        'checksum': versao['checksum'],
+        'size': versao['size'] if versao['size'] is not None else tamanho,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'ultimo_acesso': time.time(),
+    }, cache_dir)
+
+    return blob
+
+def arquivos_zip_world(item: dict) -> list:
+    # Seleciona apenas os ZIPs "world" de um release
+    return [
+        file for file in item.get('files', [])
+        if file['name'].lower().endswith('.zip') and 'world' in file['name'].lower()
+    ]
+
+def _baixar_medido(sessao: requests.Session, item_id: str, file: dict, cache_dir: Path, limite_por_host: int) -> Path:
+    with medir_etapa("download", arquivo=file['name']) as metricas:
+        return baixar_arquivo_com_cache(sessao, item_id, file, cache_dir, limite_por_host, metricas)
+
+# Falhas que isolam um release: rede (depois das retentativas), disco e metadados inesperados
+FALHAS_RELEASE = (ErroRede, requests.RequestException, OSError, ValueError, KeyError)
+
+def baixar_releases(sessao: requests.Session, ids_releases: dict, max_workers: int = USGS_MAX_DOWNLOADS, limite_por_host: int = USGS_MAX_DOWNLOADS_POR_HOST, cache_dir: Path = USGS_CACHE_DIR) -> dict:
+    # Busca os metadados de todos os releases e baixa todos os ZIPs world em paralelo.
+    # Retorna {ano: {'item_id': id, 'item': item, 'arquivos': [(nome_arquivo, caminho_zip), ...]}} na ordem de ids_releases.
+    # Um release que falha não derruba os outros: usa a versão do último fetch, se ainda estiver no cache, ou fica de fora
+    falhas = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 1) Metadados de todos os releases de uma vez
+        futuros_itens = {
+            ano: executor.submit(buscar_item_sciencebase, sessao, item_id, limite_por_host)
+            for ano, item_id in ids_releases.items()
+        }
+        itens = {}
+        for ano, futuro in futuros_itens.items():
+            try:
+                itens[ano] = futuro.result()
+            except FALHAS_RELEASE as e:
+                falhas[ano] = e
+
+        # 2) Todos os ZIPs de todos os releases de uma vez
+        futuros_zips = {}
+        for ano, item in itens.items():
+            for file in arquivos_zip_world(item):
+                futuros_zips[(ano, file['name'].lower())] = executor.submit(
+                    _baixar_medido, sessao, ids_releases[ano], file, cache_dir, limite_por_host
+                )
+
+        releases = {ano: {'item_id': ids_releases[ano], 'item': item, 'arquivos': []} for ano, item in itens.items()}
+        for (ano, file_name), futuro in futuros_zips.items():
+            try:
+                releases[ano]['arquivos'].append((file_name, futuro.result()))
+            except FALHAS_RELEASE as e:
+                falhas.setdefault(ano, e)
+
+    if falhas:
+        anteriores = carregar_releases(cache_dir)
+        for ano, erro in falhas.items():
+            releases.pop(ano, None)
+            if ano in anteriores and anteriores[ano]['item_id'] == ids_releases[ano] and anteriores[ano]['arquivos']:
+                print(f"Atenção: release {ano} falhou ({erro}), usando a versão do último fetch")
+                releases[ano] = anteriores[ano]
+            else:
+                print(f"❌ Release {ano} falhou ({erro}) e não há versão anterior no cache, seguindo sem ele")
+
+    return {ano: releases[ano] for ano in ids_releases if ano in releases}
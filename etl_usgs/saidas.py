@@ -0,0 +1,123 @@
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+except ImportError:  # parquet e arrow exigem pyarrow; excel e csv.gz funcionam sem ele
+    pa = None
+
+from .config import USGS_SAIDAS, USGS_SAIDA_DIR, USGS_DADOS_DIR
+from .cache import ler_json, gravar_json
+from .instrumentacao import medir_etapa
+
+# Saídas: cada formato grava a tabela final num caminho ou arquivo binário aberto
+
+def _tabela_colunar(df: pd.DataFrame) -> pd.DataFrame:
+    # País e commodity como categorias (dicionário no Parquet/Arrow) e valor numérico
+    return df.astype({'Country': 'category', 'Commodity': 'category', 'Valor': 'float64'})
+
+LINHAS_POR_BLOCO_EXCEL = 50_000
+
+def gravar_excel(df: pd.DataFrame, destino):
+    # Workbook write-only do openpyxl: as linhas são gravadas em sequência, sem montar o modelo de células
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append([str(col) for col in df.columns])
+    # Converte para objetos Python (None no lugar de NaN) um bloco por vez, sem cópia object da tabela inteira
+    for inicio in range(0, len(df), LINHAS_POR_BLOCO_EXCEL):
+        bloco = df.iloc[inicio:inicio + LINHAS_POR_BLOCO_EXCEL]
+        for linha in bloco.astype(object).where(bloco.notna(), None).itertuples(index=False, name=None):
+            ws.append(linha)
+    wb.save(destino)
+
+def gravar_parquet(df: pd.DataFrame, destino):
+    _tabela_colunar(df).to_parquet(destino, index=False, compression="zstd")
+
+def gravar_arrow(df: pd.DataFrame, destino):
+    tabela = pa.Table.from_pandas(_tabela_colunar(df), preserve_index=False)
+    with pa.ipc.new_file(destino, tabela.schema) as writer:
+        writer.write_table(tabela)
+
+def gravar_csv_gz(df: pd.DataFrame, destino):
+    df.to_csv(destino, index=False, compression="gzip")
+
+# Formato -> (extensão, função de gravação)
+saidas = {
+    'excel': ('.xlsx', gravar_excel),
+    'parquet': ('.parquet', gravar_parquet),
+    'arrow': ('.arrow', gravar_arrow),
+    'csv.gz': ('.csv.gz', gravar_csv_gz),
+}
+
+def caminhos_saidas(nome_base: str, formatos: list = USGS_SAIDAS, saida_dir: Path = USGS_SAIDA_DIR) -> dict:
+    # {formato: caminho} dos formatos pedidos que podem ser gravados neste ambiente
+    caminhos = {}
+    for formato in formatos:
+        if formato not in saidas:
+            print(f"Atenção: formato de saída desconhecido '{formato}', ignorando")
+            continue
+        if formato in ('parquet', 'arrow') and pa is None:
+            print(f"Atenção: formato '{formato}' requer pyarrow, ignorando")
+            continue
+        caminhos[formato] = saida_dir / f"{nome_base}{saidas[formato][0]}"
+    return caminhos
+
+def gravar_saidas(df: pd.DataFrame, nome_base: str, formatos: list = USGS_SAIDAS, saida_dir: Path = USGS_SAIDA_DIR) -> list:
+    # Grava a tabela em cada formato pedido e devolve os caminhos gerados
+    saida_dir.mkdir(parents=True, exist_ok=True)
+    caminhos = []
+    for formato, caminho in caminhos_saidas(nome_base, formatos, saida_dir).items():
+        with medir_etapa("serializar", formato=formato, linhas_entrada=len(df)) as metricas:
+            saidas[formato][1](df, caminho)
+            metricas['bytes'] = caminho.stat().st_size
+        print(f"Saída gravada: {caminho} ({caminho.stat().st_size / 1024:.0f} KB)")
+        caminhos.append(caminho)
+    return caminhos
+
+# Estado das saídas: versão da tabela gravada em cada arquivo de saída e no banco local, e a versão de cada
+# arquivo já publicada no SharePoint. Cada saída é regravada ou reenviada só quando está ausente ou atrás
+# da tabela atual, independentemente do que o modo incremental decidiu sobre os ZIPs
+
+def _caminho_estado(dados_dir: Path) -> Path:
+    return dados_dir / "estado_saidas.json"
+
+def _chave_saida(caminho) -> str:
+    return str(Path(caminho).resolve())
+
+def versao_tabela(df: pd.DataFrame) -> str:
+    # Impressão digital do conteúdo (colunas, valores e ordem das linhas) da tabela final
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(",".join(df.columns).encode("utf-8") + hashes.tobytes()).hexdigest()[:32]
+
+def ler_estado_saidas(dados_dir: Path = USGS_DADOS_DIR) -> dict:
+    estado = ler_json(_caminho_estado(dados_dir))
+    for secao in ('gravadas', 'publicadas'):
+        estado.setdefault(secao, {})
+    return estado
+
+def gravar_estado_saidas(estado: dict, dados_dir: Path = USGS_DADOS_DIR):
+    gravar_json(_caminho_estado(dados_dir), estado)
+
+def saida_atualizada(estado: dict, caminho, versao: str) -> bool:
+    return Path(caminho).exists() and estado['gravadas'].get(_chave_saida(caminho)) == versao
+
+def registrar_gravacao(estado: dict, caminho, versao: str):
+    estado['gravadas'][_chave_saida(caminho)] = versao
+
+def saidas_nao_publicadas(caminhos: list, dados_dir: Path = USGS_DADOS_DIR) -> list:
+    # Saídas cuja versão em disco ainda não foi enviada com sucesso (ou cujo envio falhou)
+    estado = ler_estado_saidas(dados_dir)
+    return [
+        caminho for caminho in caminhos
+        if estado['gravadas'].get(_chave_saida(caminho)) is None
+        or estado['publicadas'].get(_chave_saida(caminho)) != estado['gravadas'][_chave_saida(caminho)]
+    ]
+
+def registrar_publicacao(caminho, dados_dir: Path = USGS_DADOS_DIR):
+    # Chamado só depois de um upload bem-sucedido: marca a versão em disco como publicada
+    estado = ler_estado_saidas(dados_dir)
+    estado['publicadas'][_chave_saida(caminho)] = estado['gravadas'].get(_chave_saida(caminho))
+    gravar_estado_saidas(estado, dados_dir)
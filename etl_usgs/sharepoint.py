@@ -0,0 +1,230 @@
+import io
+import time
+import tempfile
+import requests
+import pandas as pd
+from pathlib import Path
+from urllib.parse import quote, unquote, urlsplit
+
+from .config import SHAREPOINT_DOC, USGS_UPLOAD_BLOCO_MB, USGS_UPLOAD_TENTATIVAS, USGS_UPLOAD_TIMEOUT
+from .autenticacao import obter_sessao_sharepoint
+from .saidas import gravar_excel
+
+# A sessão de upload só aceita blocos múltiplos de 320 KiB (o último pode ser menor)
+BLOCO_MULTIPLO = 320 * 1024
+
+# Id do drive (biblioteca SHAREPOINT_DOC) de cada site, procurado uma vez por execução
+_drives = {}
+
+class ErroUpload(Exception):
+    pass
+
+def _com_retentativas(sessao: requests.Session, metodo: str, url: str, tentativas: int = USGS_UPLOAD_TENTATIVAS, timeout: float = USGS_UPLOAD_TIMEOUT, **kwargs) -> requests.Response:
+    # Repete a requisição em falhas de conexão, 429 ou 5xx, com espera exponencial (1s, 2s, 4s...)
+    for tentativa in range(1, tentativas + 1):
+        try:
+            response = sessao.request(metodo, url, timeout=timeout, **kwargs)
+            if response.status_code < 500 and response.status_code != 429:
+                return response
+            motivo = f"Status Code {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            motivo = str(e)
+
+        if tentativa == tentativas:
+            raise ErroUpload(f"{tentativas} tentativas sem sucesso ({motivo})")
+        espera = 2 ** (tentativa - 1)
+        print(f"   Tentativa {tentativa} falhou ({motivo}), repetindo em {espera}s...")
+        time.sleep(espera)
+
+def _abrir_conteudo(conteudo, tamanho_bloco: int) -> tuple:
+    # Devolve (arquivo binário, tamanho total). A retomada relê o conteúdo a partir do offset confirmado pelo
+    # servidor, então um iterável/gerador de bytes é despejado antes num temporário (em disco acima de um bloco)
+    if isinstance(conteudo, (bytes, bytearray)):
+        return io.BytesIO(conteudo), len(conteudo)
+
+    if isinstance(conteudo, (str, Path)):
+        return open(conteudo, "rb"), Path(conteudo).stat().st_size
+
+    arquivo = tempfile.SpooledTemporaryFile(max_size=tamanho_bloco)
+    for parte in conteudo:
+        arquivo.write(parte)
+    tamanho = arquivo.tell()
+    arquivo.seek(0)
+    return arquivo, tamanho
+
+def _proximo_offset(dados: dict) -> int:
+    # nextExpectedRanges: ["26-"] ou ["0-25", "77-"]; o envio continua do início da primeira faixa que falta
+    return int(dados['nextExpectedRanges'][0].split("-")[0])
+
+def _consultar_sessao(sessao: requests.Session, upload_url: str, tentativas: int):
+    # Offset que o servidor espera a seguir; None se a sessão não existe mais (concluída, cancelada ou expirada)
+    response = _com_retentativas(sessao, "get", upload_url, tentativas)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise ErroUpload(f"Consulta da sessão falhou. Status Code: {response.status_code}: {response.text[:500]}")
+    return _proximo_offset(response.json())
+
+def _cancelar_sessao(sessao: requests.Session, upload_url: str):
+    # Melhor esforço: os blocos de uma sessão não concluída nunca chegam ao arquivo publicado
+    try:
+        sessao.delete(upload_url, timeout=USGS_UPLOAD_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print(f"   Sessão de upload não cancelada: {e}")
+
+def _resolver_drive(sessao: requests.Session, api_v2: str, headers: dict, tentativas: int) -> str:
+    # A biblioteca SHAREPOINT_DOC é um dos drives do site, procurado pela URL
+    if api_v2 not in _drives:
+        response = _com_retentativas(sessao, "get", f"{api_v2}drives?$select=id,webUrl", tentativas, headers=headers)
+        if response.status_code != 200:
+            raise ErroUpload(f"Lista de bibliotecas falhou. Status Code: {response.status_code}: {response.text[:500]}")
+        biblioteca = "/" + unquote(SHAREPOINT_DOC or "").strip("/")
+        for drive in response.json().get('value', []):
+            if ("/" + unquote(urlsplit(drive['webUrl']).path).strip("/")).endswith(biblioteca):
+                _drives[api_v2] = drive['id']
+                break
+        else:
+            raise ErroUpload(f"Biblioteca '{SHAREPOINT_DOC}' não encontrada no site")
+    return _drives[api_v2]
+
+def _consultar_item(sessao: requests.Session, api_item: str, headers: dict, tentativas: int):
+    # Metadados (eTag, tamanho) do arquivo publicado; None se ele ainda não existe
+    response = _com_retentativas(sessao, "get", f"{api_item}?$select=eTag,size,webUrl", tentativas, headers=headers)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise ErroUpload(f"Consulta do arquivo falhou. Status Code: {response.status_code}: {response.text[:500]}")
+    return response.json()
+
+def _enviar_blocos(sessao: requests.Session, upload_url: str, arquivo, total: int, tamanho_bloco: int, tentativas: int):
+    # Envia os blocos a partir do offset que o servidor espera. Sem resposta clara (rede, 429, 5xx, ou um 4xx
+    # como o 416 de um bloco que já tinha sido gravado) consulta a sessão e segue do offset que ela confirma:
+    # um bloco gravado cuja resposta se perdeu não é reenviado. As tentativas recomeçam a cada bloco aceito.
+    # Devolve a resposta do último bloco, ou None se a sessão sumiu logo depois dele
+    offset, falhas = 0, 0
+    while True:
+        arquivo.seek(offset)
+        bloco = arquivo.read(tamanho_bloco)
+        # A uploadUrl já é autenticada: não leva o cabeçalho Authorization
+        headers = {'Content-Range': f"bytes {offset}-{offset + len(bloco) - 1}/{total}"}
+        try:
+            response = sessao.put(upload_url, headers=headers, data=bloco, timeout=USGS_UPLOAD_TIMEOUT)
+            if response.status_code in (200, 201):
+                return response
+            if response.status_code == 202:
+                offset, falhas = _proximo_offset(response.json()), 0
+                print(f"   {offset / 1024 / 1024:.1f} MB enviados")
+                continue
+            motivo = f"Status Code {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            motivo = str(e)
+
+        falhas += 1
+        if falhas == tentativas:
+            raise ErroUpload(f"{tentativas} tentativas sem sucesso no offset {offset} ({motivo})")
+        espera = 2 ** (falhas - 1)
+        print(f"   Bloco no offset {offset} falhou ({motivo}), consultando a sessão em {espera}s...")
+        time.sleep(espera)
+
+        confirmado = _consultar_sessao(sessao, upload_url, tentativas)
+        if confirmado is None:
+            if offset + len(bloco) == total:
+                return None
+            raise ErroUpload("a sessão de upload expirou ou foi cancelada")
+        if confirmado != offset:
+            print(f"   Servidor confirmou até o offset {confirmado}, retomando dali")
+        offset = confirmado
+
+def upload_arquivo_para_sharepoint(access_token: str, sharepoint_url: str, sharepoint_site: str, pasta_destino: str, nome_arquivo: str, conteudo, tamanho_bloco: int = USGS_UPLOAD_BLOCO_MB * 1024 * 1024, tentativas: int = USGS_UPLOAD_TENTATIVAS, sessao: requests.Session = None) -> bool:
+    # Arquivos que cabem num único bloco vão direto no Files/add. Os maiores vão numa sessão de upload
+    # (createUploadSession da API v2.0 do site, a mesma do Microsoft Graph), retomada do offset confirmado pelo
+    # servidor quando um bloco falha. O arquivo publicado só é substituído quando o último byte chega:
+    # uma falha no meio nunca o deixa vazio ou pela metade (a sessão é cancelada)
+
+    if not all([access_token, sharepoint_url, sharepoint_site, pasta_destino, nome_arquivo]):
+        print("Todos os parâmetros (token, URL, subpasta do site, pasta de destino, nome do arquivo) são obrigatórios.")
+        return False
+
+    print("\n" + "="*50)
+    print("INICIANDO UPLOAD DE ARQUIVO PARA O SHAREPOINT")
+    print("="*50)
+
+    sessao = sessao or obter_sessao_sharepoint()
+    tamanho_bloco = max(BLOCO_MULTIPLO, tamanho_bloco // BLOCO_MULTIPLO * BLOCO_MULTIPLO)
+    arquivo, total = _abrir_conteudo(conteudo, tamanho_bloco)
+
+    upload_url = None
+    try:
+        if total <= tamanho_bloco:
+            # Cabe num bloco só: upload simples
+            api_url = f"{sharepoint_url}{sharepoint_site}/_api/web/GetFolderByServerRelativeUrl('{SHAREPOINT_DOC}/{pasta_destino}')/Files/add(url='{nome_arquivo}',overwrite=true)"
+            headers = {
+                'Authorization': f'Bearer {access_token}',
+                'Accept': 'application/json;odata=verbose',
+                'Content-Type': 'application/octet-stream' # Indica que estamos enviando dados binários
+            }
+            print(f"▶️  Enviando arquivo '{nome_arquivo}' para a pasta '{pasta_destino}'...")
+            print(f"▶️  URL da API: {api_url}")
+
+            response = _com_retentativas(sessao, "post", api_url, tentativas, headers=headers, data=arquivo.read())
+            if response.status_code not in (200, 201):
+                raise ErroUpload(f"Status Code: {response.status_code}: {response.text[:500]}")
+            file_url = f"{sharepoint_url}{response.json().get('d', {}).get('ServerRelativeUrl', '')}"
+        else:
+            api_v2 = f"{sharepoint_url}{sharepoint_site}/_api/v2.0/"
+            headers = {'Authorization': f'Bearer {access_token}', 'Accept': 'application/json'}
+            print(f"▶️  Enviando arquivo '{nome_arquivo}' para a pasta '{pasta_destino}' em blocos de {tamanho_bloco / 1024 / 1024:.1f} MB...")
+            drive = _resolver_drive(sessao, api_v2, headers, tentativas)
+            api_item = f"{api_v2}drives/{drive}/root:/{quote(f'{pasta_destino}/{nome_arquivo}')}:"
+            print(f"▶️  URL da API: {api_item}/createUploadSession")
+
+            # eTag da versão publicada, para reconhecer a nova se a resposta do último bloco se perder
+            anterior = _consultar_item(sessao, api_item, headers, tentativas)
+            response = _com_retentativas(
+                sessao, "post", f"{api_item}/createUploadSession", tentativas, headers=headers,
+                json={'item': {'@microsoft.graph.conflictBehavior': 'replace'}}
+            )
+            if response.status_code != 200:
+                raise ErroUpload(f"createUploadSession falhou. Status Code: {response.status_code}: {response.text[:500]}")
+            upload_url = response.json()['uploadUrl']
+
+            response = _enviar_blocos(sessao, upload_url, arquivo, total, tamanho_bloco, tentativas)
+            upload_url = None
+            if response is None:
+                # A sessão terminou sem confirmar o último bloco: vale se o arquivo publicado já é a versão nova
+                item = _consultar_item(sessao, api_item, headers, tentativas)
+                if not item or item.get('size') != total or item.get('eTag') == (anterior or {}).get('eTag'):
+                    raise ErroUpload("a sessão terminou sem confirmar o último bloco")
+                file_url = item.get('webUrl')
+            else:
+                file_url = response.json().get('webUrl')
+
+    except (ErroUpload, requests.exceptions.RequestException, ValueError, KeyError, IndexError) as e:
+        print(f"❌ Falha no upload do arquivo '{nome_arquivo}': {e}")
+        if upload_url:
+            _cancelar_sessao(sessao, upload_url)
+        return False
+    finally:
+        arquivo.close()
+
+    print(f"✅ Arquivo '{nome_arquivo}' enviado com sucesso!")
+    if file_url:
+        print(f"   URL do arquivo: {file_url}")
+    return True
+
+def upload_excel_para_sharepoint(access_token: str, sharepoint_url: str, sharepoint_site: str, pasta_destino: str, nome_arquivo: str, df: pd.DataFrame):
+
+    if df.empty:
+        print("O DataFrame fornecido está vazio.")
+        return
+
+    # Converte o DataFrame para um arquivo Excel em um buffer de bytes na memória.
+    try:
+        excel_buffer = io.BytesIO()
+        gravar_excel(df, excel_buffer)
+        file_content = excel_buffer.getvalue()
+    except Exception as e:
+        print(f"❌ Erro ao converter o DataFrame para Excel: {e}")
+        return
+
+    upload_arquivo_para_sharepoint(access_token, sharepoint_url, sharepoint_site, pasta_destino, nome_arquivo, file_content)
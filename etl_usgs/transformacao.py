@@ -0,0 +1,433 @@
+import re
+import time
+import zipfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow é opcional: sem ele a limpeza numérica usa o str.replace do pandas
+    pa = pc = None
+
+from .config import USGS_MAX_PROCESSOS, USGS_ANOS_LEGADO, USGS_ANOS_2025
+from .mapas import sciencebase_ids, mapa_commodities
+from .normalizacao import normalizar_nomes, normalizador_paises, normalizador_commodities_2025, selecionar_commodities, commodities_selecionadas
+from .instrumentacao import medir_memoria, registrar_etapa
+
+# Releases atendidos por cada layout (declarados na tabela layouts): até 2024 o layout antigo
+# (Country/Type/prod_t_AAAA), 2025 o layout novo. Um release novo só é processado depois de ganhar um layout
+def _release_legado(ano: int) -> bool:
+    return ano <= 2024
+
+def _release_2025(ano: int) -> bool:
+    return ano == 2025
+
+anos_releases_legado = [ano for ano in sciencebase_ids if _release_legado(ano)]
+
+def montar_indice_selecao(anos: list, commodities: dict) -> dict:
+    # Índice {nome do CSV: (ano do release, abreviação da commodity)} gerado a partir do mapa de commodities,
+    # no lugar da lista fixa de nomes; incluir uma commodity ou um ano não exige editar nomes de arquivos
+    return {
+        f"mcs{ano}-{abrev}_world.csv": (ano, abrev)
+        for ano in anos
+        for abrev in commodities
+    }
+
+# Commodities fora da seleção (USGS_COMMODITIES) não entram no índice: seus CSVs nem são abertos
+commodities_legado = selecionar_commodities(mapa_commodities, commodities_selecionadas)
+arquivos_desejados = montar_indice_selecao(anos_releases_legado, commodities_legado)
+
+def selecionar_membros(z: zipfile.ZipFile, indice: dict) -> dict:
+    # Resolve os membros desejados direto do diretório central do ZIP, com busca O(1) no índice.
+    # Retorna {nome do membro no ZIP: (ano, abreviação)}
+    return {
+        info.filename: indice[info.filename.rsplit("/", 1)[-1].lower()]
+        for info in z.infolist()
+        if info.filename.rsplit("/", 1)[-1].lower() in indice
+    }
+
+def membros_ausentes(caminho_zip, indice: dict, ano: int) -> list:
+    # Lista os CSVs esperados para o release que não existem no ZIP, sem descompactar nada
+    with zipfile.ZipFile(caminho_zip) as z:
+        encontrados = {nome.rsplit("/", 1)[-1].lower() for nome in z.namelist()}
+    return sorted(nome for nome, (ano_indice, _) in indice.items() if ano_indice == ano and nome not in encontrados)
+
+#Caso a parte em aluminio
+tipo_por_commodity = {
+    "alumi": "smelter production",
+}
+
+# Tudo que não é dígito, ponto ou sinal (notas de rodapé como "W", "NA", o "e" de "12,000e", vírgulas...)
+_padrao_nao_numerico = r"[^\d\.\-]"
+# O que sobra precisa ser um número válido; "5-" ou "1.2.3" viram nulo, como no pd.to_numeric(errors='coerce')
+_padrao_numero = r"^-?(\d+\.?\d*|\.\d+)$"
+
+def _limpar_texto_pyarrow(colunas: list) -> np.ndarray:
+    # Uma única passada do motor de regex do Arrow sobre todas as colunas encadeadas
+    arr = pa.chunked_array([pa.array(col, from_pandas=True, type=pa.string()) for col in colunas])
+    limpo = pc.replace_substring_regex(arr, pattern=_padrao_nao_numerico, replacement="")
+    valido = pc.match_substring_regex(limpo, _padrao_numero)
+    numeros = pc.cast(pc.if_else(valido, limpo, pa.scalar(None, pa.string())), pa.float64())
+    return numeros.to_numpy().reshape(len(colunas), -1).T
+
+def _limpar_texto_pandas(colunas: list) -> np.ndarray:
+    return np.column_stack([
+        pd.to_numeric(col.astype(str).str.replace(_padrao_nao_numerico, "", regex=True), errors='coerce')
+        .to_numpy(dtype="float64", na_value=np.nan)
+        for col in colunas
+    ])
+
+def escala_por_coluna(df: pd.DataFrame, colunas: list) -> np.ndarray:
+    # Fator de conversão para toneladas a partir do nome da coluna (prod_kt_AAAA -> x1000)
+    return np.array([1000.0 if '_kt_' in col.lower() else 1.0 for col in colunas])
+
+def limpar_colunas_producao(df: pd.DataFrame, colunas: list, escala: np.ndarray = None) -> np.ndarray:
+    # Converte todas as colunas de produção de uma vez e aplica o fator de unidade na mesma operação.
+    # escala pode ser por coluna (k,) ou por linha (n, 1); por padrão vem do nome da coluna.
+    # Colunas que o read_csv já leu como numéricas não passam pela limpeza de texto
+    bloco = df[colunas]
+    valores = np.empty((len(bloco), len(colunas)), dtype="float64")
+
+    colunas_texto = []
+    for i, col in enumerate(colunas):
+        if pd.api.types.is_numeric_dtype(bloco[col]):
+            valores[:, i] = bloco[col].to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            colunas_texto.append(i)
+
+    if colunas_texto and len(bloco):
+        limpar_texto = _limpar_texto_pyarrow if pa is not None else _limpar_texto_pandas
+        valores[:, colunas_texto] = limpar_texto([bloco.iloc[:, i] for i in colunas_texto])
+
+    if escala is None:
+        escala = escala_por_coluna(df, colunas)
+    return valores * escala
+
+# Formatos de CSV (layouts) dos releases
+FORMATO_LEGADO = "legado"
+FORMATO_2025 = "2025"
+
+def _preparar_legado(df: pd.DataFrame, file_name: str, commodity_abrev: str):
+    # Verificar coluna Type
+    tipos_unicos = df['Type'].dropna().unique()
+
+    if len(tipos_unicos) > 1:
+        if commodity_abrev in tipo_por_commodity:
+            tipo_desejado = tipo_por_commodity[commodity_abrev]
+            df = df[df['Type'] == tipo_desejado]
+            print(f"Arquivo {file_name}: múltiplos tipos encontrados, filtrando pelo tipo '{tipo_desejado}'")
+        else:
+            print(f"Atenção: arquivo {file_name} tem múltiplos tipos e nenhum tipo definido no mapa: {tipos_unicos}")
+    # um ou nenhum tipo → mantém todas as linhas
+
+    # Identificar commodity pelo nome do arquivo
+    df = df.assign(Commodity=mapa_commodities.get(commodity_abrev, commodity_abrev))
+    return df
+
+def _membros_legado(z: zipfile.ZipFile, ano: int) -> list:
+    # Um CSV mcsAAAA-<abrev>_world.csv por commodity selecionada
+    return [(membro, abrev) for membro, (_, abrev) in selecionar_membros(z, montar_indice_selecao([ano], commodities_legado)).items()]
+
+def _colunas_producao_legado(df: pd.DataFrame, file_name: str) -> list:
+    # Selecionar apenas colunas válidas (sem *_notes)
+    colunas_producao = [
+        col for col in df.columns 
+        if re.match(r'prod_(?:t|kt)_\d{4}$', col, re.IGNORECASE) and "_notes" not in col.lower()
+    ]
+
+    # Se não houver colunas reais, tenta estimadas no mesmo formato
+    if not colunas_producao:
+        colunas_producao = [
+            col for col in df.columns 
+            if re.match(r'prod_(?:t|kt)_est_\d{4}$', col, re.IGNORECASE) and "_notes" not in col.lower()
+        ]
+        if colunas_producao:
+            print(f"Atenção: usando produção ESTIMADA no arquivo {file_name}")
+        else:
+            print(f"Nenhuma coluna de produção encontrada em {file_name}, pulando...")
+
+    return colunas_producao
+
+def _preparar_2025(df: pd.DataFrame, file_name: str, commodity_abrev: str):
+    if 'UNIT_MEAS' not in df.columns:
+        print("Coluna UNIT_MEAS não encontrada.")
+        return None
+
+    # Mantém só as commodities acompanhadas e traduz o nome (antes do melt, sobre o formato largo)
+    commodities = normalizar_nomes(df["Commodity"], normalizador_commodities_2025, manter_original=False)
+    df = df.assign(Commodity=commodities)[commodities.notna()]
+    return df
+
+def _membros_2025(z: zipfile.ZipFile, ano: int) -> list:
+    # Todos os CSVs; a commodity vem da coluna COMMODITY e é filtrada no preparar
+    return [(membro, None) for membro in z.namelist() if membro.endswith(".csv")]
+
+def _colunas_producao_2025(df: pd.DataFrame, file_name: str) -> list:
+    # PROD_AAAA e PROD_EST_AAAA; as colunas PROD_NOTES_* são texto e ficam de fora
+    colunas_producao = [col for col in df.columns if col.startswith("PROD_") and "NOTES" not in col.upper()]
+
+    if not colunas_producao:
+        print("Nenhuma coluna de produção detectada.")
+
+    return colunas_producao
+
+def _escala_por_unidade(df: pd.DataFrame, colunas: list) -> np.ndarray:
+    # Normalizar e converter de thousand para metric tons (um fator por linha)
+    unidade = df["UNIT_MEAS"].astype(str).str.strip().str.lower()
+    return np.where(unidade == "thousand metric tons", 1000.0, 1.0)[:, None]
+
+# Cada layout declara os releases que atende e como escolhe os CSVs dentro do ZIP (membros: (z, ano) ->
+# [(membro, abreviação)]), o mapeamento de colunas, as colunas lidas do CSV (fixas e o padrão das de produção,
+# com o ano no grupo 1), a seleção das colunas de produção, a conversão de unidade, os anos mantidos
+# (da configuração) e seus filtros; listar_tarefas e o motor em transformar_csv são os mesmos para todos
+layouts = {
+    FORMATO_LEGADO: {
+        'releases': _release_legado,
+        'membros': _membros_legado,
+        'read_csv': {'sep': ",", 'thousands': ",", 'quotechar': '"'},
+        'colunas': {'Country': 'Country'},
+        'colunas_fixas': ['Country', 'Type'],
+        'padrao_producao': r'prod_(?:t|kt)_(?:est_)?(\d{4})$',
+        'preparar': _preparar_legado,
+        'colunas_producao': _colunas_producao_legado,
+        'escala': escala_por_coluna,
+        'anos': USGS_ANOS_LEGADO,
+        'descartar_vazios': True,  # remove a linha apenas se país E valor estiverem nulos
+    },
+    FORMATO_2025: {
+        'releases': _release_2025,
+        'membros': _membros_2025,
+        'read_csv': {},
+        'colunas': {'COUNTRY': 'Country', 'COMMODITY': 'Commodity', 'TYPE': 'Type'},
+        'colunas_fixas': ['COUNTRY', 'COMMODITY', 'TYPE', 'UNIT_MEAS'],
+        'padrao_producao': r'PROD_(?:EST_)?(\d{4})$',
+        'preparar': _preparar_2025,
+        'colunas_producao': _colunas_producao_2025,
+        'escala': _escala_por_unidade,
+        'anos': USGS_ANOS_2025,
+        'descartar_vazios': False,
+    },
+}
+
+# Esquema da tabela longa final: categorias para país/commodity, ano em int16 e valor em float64 (NaN = sem dado).
+# Tipo é a série da commodity (Type/TYPE do CSV, em minúsculas; "" quando o arquivo não tem), Release é o ano
+# do release MCS de onde o valor veio e Estimado marca os valores das colunas *_est_*
+ESQUEMA_TABELA = {
+    'Country': 'category', 'Valor': 'float64', 'Ano': 'int16', 'Commodity': 'category',
+    'Tipo': 'category', 'Release': 'int16', 'Estimado': 'bool',
+}
+COLUNAS_TABELA = list(ESQUEMA_TABELA)
+
+def assinatura_processamento() -> dict:
+    # Seleção de anos/commodities e esquema em vigor; o modo incremental reprocessa tudo quando mudam
+    return {
+        'anos': {formato: layout['anos'] for formato, layout in layouts.items()},
+        'commodities': sorted(commodities_selecionadas or []),
+        'esquema': ESQUEMA_TABELA,
+    }
+
+def aplicar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[COLUNAS_TABELA]
+    return df.assign(Ano=pd.to_numeric(np.asarray(df['Ano']))).astype(ESQUEMA_TABELA)
+
+def concatenar_tabelas(dfs: list) -> pd.DataFrame:
+    # Concatena mantendo as categorias: pd.concat de categóricas com categorias diferentes viraria object
+    if not dfs:
+        return aplicar_esquema(pd.DataFrame(columns=COLUNAS_TABELA))
+    return pd.DataFrame({
+        'Country': union_categoricals([df['Country'] for df in dfs], ignore_order=True),
+        'Valor': np.concatenate([df['Valor'].to_numpy(dtype="float64") for df in dfs]),
+        'Ano': np.concatenate([df['Ano'].to_numpy(dtype=ESQUEMA_TABELA['Ano']) for df in dfs]),
+        'Commodity': union_categoricals([df['Commodity'] for df in dfs], ignore_order=True),
+        'Tipo': union_categoricals([df['Tipo'] for df in dfs], ignore_order=True),
+        'Release': np.concatenate([df['Release'].to_numpy(dtype=ESQUEMA_TABELA['Release']) for df in dfs]),
+        'Estimado': np.concatenate([df['Estimado'].to_numpy(dtype=bool) for df in dfs]),
+    })
+
+def reconciliar_releases(df: pd.DataFrame) -> pd.DataFrame:
+    # Releases sobrepostos repetem o mesmo (país, commodity, tipo, ano), muitas vezes com o valor revisado.
+    # Uma única ordenação (lexsort sobre os códigos) escolhe o release mais recente de cada chave; se ele
+    # publica o valor como W/NA (nulo), o nulo prevalece sobre o número desatualizado de um release anterior.
+    # Só linhas de releases diferentes são descartadas: repetições dentro do mesmo release (séries sem
+    # Type distinto, nomes de país que normalizam igual) são mantidas como no arquivo.
+    # As linhas mantidas conservam a ordem original e as colunas Release/Estimado dizem de onde vieram
+    if df.empty:
+        return df
+    paises = df['Country'].cat.codes.to_numpy()
+    commodities = df['Commodity'].cat.codes.to_numpy()
+    tipos = df['Tipo'].cat.codes.to_numpy()
+    anos = df['Ano'].to_numpy()
+    valores = df['Valor'].to_numpy()
+    releases = df['Release'].to_numpy()
+    ordem = np.lexsort((-releases.astype("int32"), anos, tipos, commodities, paises))
+
+    # Primeira linha de cada grupo de chave igual na ordem acima; o release dela vence no grupo
+    chaves = (paises[ordem], commodities[ordem], tipos[ordem], anos[ordem])
+    primeira = np.ones(len(ordem), dtype=bool)
+    primeira[1:] = np.any([chave[1:] != chave[:-1] for chave in chaves], axis=0)
+    grupo = np.cumsum(primeira) - 1
+    manter = releases[ordem] == releases[ordem][primeira][grupo]
+
+    # Revisões: chaves em que outro release trazia um valor preenchido e diferente do escolhido
+    escolhido = valores[ordem][primeira][grupo]
+    revisados = np.unique(grupo[~manter & ~np.isnan(valores[ordem]) & (valores[ordem] != escolhido)])
+
+    mantidas = np.sort(ordem[manter])
+    duplicadas = len(df) - len(mantidas)
+    if duplicadas:
+        print(f"Reconciliação: {duplicadas} linha(s) repetida(s) entre releases descartada(s), {len(revisados)} valor(es) revisado(s)")
+    return df.iloc[mantidas].reset_index(drop=True)
+
+def relatorio_memoria(df: pd.DataFrame):
+    # Compara o uso de memória do esquema tipado com o esquema antigo (strings object, int64 e Valor object com None)
+    antigo = df.astype({'Country': object, 'Commodity': object, 'Tipo': object, 'Ano': 'int64'})
+    antigo['Valor'] = antigo['Valor'].astype(object).where(antigo['Valor'].notna(), None)
+    antes = antigo.memory_usage(deep=True, index=False)
+    depois = df.memory_usage(deep=True, index=False)
+    print(f"\nMEMÓRIA DA TABELA FINAL ({len(df)} linhas)")
+    for col in COLUNAS_TABELA:
+        print(f"   {col:<10} {antes[col] / 1024:>10.1f} KB -> {depois[col] / 1024:>10.1f} KB")
+    print(f"   {'Total':<10} {antes.sum() / 1024:>10.1f} KB -> {depois.sum() / 1024:>10.1f} KB ({antes.sum() / max(depois.sum(), 1):.1f}x menor)")
+
+def normalizar_paises(paises: pd.Series) -> pd.Series:
+    # Normalizar nomes de países
+    return normalizar_nomes(paises, normalizador_paises)
+
+def _tipos(df: pd.DataFrame) -> np.ndarray:
+    # Série de cada linha (mine, refinery, smelter production...) para a chave da reconciliação
+    if 'Type' not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    return df['Type'].astype("string").str.strip().str.lower().fillna("").to_numpy(dtype=object)
+
+def filtro_colunas(layout: dict):
+    # Predicado para o usecols do read_csv: só as colunas fixas do layout e as de produção dos anos
+    # desejados são convertidas; notas, fontes e anos fora da janela nunca viram colunas do DataFrame
+    fixas = set(layout['colunas_fixas'])
+    padrao = re.compile(layout['padrao_producao'], re.IGNORECASE)
+    anos = set(layout['anos'])
+
+    def ler_coluna(col: str) -> bool:
+        if col in fixas:
+            return True
+        ano = padrao.match(col)
+        return ano is not None and int(ano.group(1)) in anos
+
+    return ler_coluna
+
+def transformar_csv(f, file_name, layout: dict, commodity_abrev: str = None, ano_release: int = 0):
+    # Motor único: lê um CSV de qualquer layout e devolve o formato longo [Country, Valor, Ano, Commodity, Tipo, Release, Estimado]
+    df = pd.read_csv(f, usecols=filtro_colunas(layout), **layout['read_csv'])
+    linhas_lidas = len(df)
+    df = df.rename(columns=layout['colunas'])
+
+    # Filtros de linha (tipo, commodities selecionadas) antes da limpeza e do melt
+    df = layout['preparar'](df, file_name, commodity_abrev)
+    if df is None:
+        return None
+
+    colunas_producao = layout['colunas_producao'](df, file_name)
+    if not colunas_producao:
+        return None
+
+    # Ano de cada coluna extraído uma única vez (e não por linha depois do melt)
+    anos_colunas = np.array([int(re.search(r'(\d{4})', col).group(1)) for col in colunas_producao])
+    estimadas = np.array(['_est_' in col.lower() for col in colunas_producao])
+
+    # Limpeza, conversão e unidade numa única passada; só as colunas dos anos desejados
+    valores = limpar_colunas_producao(df, colunas_producao, layout['escala'](df, colunas_producao))
+
+    # Melt: as colunas de produção empilhadas uma após a outra, como no DataFrame.melt.
+    # País e commodity são repetidos só como códigos das categorias (sempre texto, para o union_categoricals)
+    n_linhas, n_colunas = valores.shape
+    paises = pd.Categorical(normalizar_paises(df['Country']))
+    commodities = pd.Categorical(df['Commodity'])
+    tipos = pd.Categorical(_tipos(df))
+    df_long = pd.DataFrame({
+        'Country': pd.Categorical.from_codes(np.tile(paises.codes, n_colunas), paises.categories.astype(str)),
+        'Valor': valores.ravel(order="F"),
+        'Ano': np.repeat(anos_colunas, n_linhas).astype(ESQUEMA_TABELA['Ano']),
+        'Commodity': pd.Categorical.from_codes(np.tile(commodities.codes, n_colunas), commodities.categories.astype(str)),
+        'Tipo': pd.Categorical.from_codes(np.tile(tipos.codes, n_colunas), tipos.categories.astype(str)),
+        'Release': np.full(n_linhas * n_colunas, ano_release, dtype=ESQUEMA_TABELA['Release']),
+        'Estimado': np.repeat(estimadas, n_linhas),
+    })
+
+    if layout['descartar_vazios']:
+        df_long = df_long.dropna(subset=['Country', 'Valor'], how='all')
+
+    df_long.attrs['linhas_entrada'] = linhas_lidas
+    return df_long
+
+def processar_zip(caminho_zip, arquivos_desejados, fonte_label,):
+    dfs = []
+
+    # Aceita caminho ou arquivo; os membros são descompactados um de cada vez, sob demanda
+    with zipfile.ZipFile(caminho_zip) as z:
+        for file_name, (ano_release, commodity_abrev) in selecionar_membros(z, arquivos_desejados).items():
+            with z.open(file_name) as f:
+                df_long = transformar_csv(f, file_name, layouts[FORMATO_LEGADO], commodity_abrev, ano_release)
+            if df_long is not None:
+                dfs.append(df_long)
+
+    return dfs
+
+def formatos_do_release(ano: int) -> list:
+    return [formato for formato, layout in layouts.items() if layout['releases'](ano)]
+
+def releases_sem_layout(anos) -> list:
+    # Releases que nenhum layout declara atender; seriam baixados e ignorados sem aviso
+    sem_layout = [ano for ano in anos if not formatos_do_release(ano)]
+    if sem_layout:
+        print(f"Atenção: release(s) {sem_layout} sem layout declarado em transformacao.layouts, não serão processados")
+    return sem_layout
+
+def listar_tarefas(releases: dict) -> list:
+    # Uma tarefa por (arquivo ZIP, membro CSV), na mesma ordem em que o modo serial processa os dados:
+    # layout por layout (na ordem da tabela layouts), release por release
+    releases_sem_layout(releases)
+    tarefas = []
+    for formato, layout in layouts.items():
+        for ano, release in releases.items():
+            if not layout['releases'](ano):
+                continue
+            for file_name, caminho_zip in release['arquivos']:
+                with zipfile.ZipFile(caminho_zip) as z:
+                    for membro, commodity_abrev in layout['membros'](z, ano):
+                        tarefas.append((str(caminho_zip), membro, formato, commodity_abrev, ano))
+    return tarefas
+
+def transformar_membro(tarefa: tuple):
+    # Executado dentro do worker: abre o ZIP pelo caminho e transforma um único membro
+    caminho_zip, membro, formato, commodity_abrev, ano_release = tarefa
+    with zipfile.ZipFile(caminho_zip) as z:
+        with z.open(membro) as f:
+            return transformar_csv(f, membro, layouts[formato], commodity_abrev, ano_release)
+
+def _transformar_membro_medido(tarefa: tuple) -> tuple:
+    # As métricas são medidas dentro do worker e devolvidas junto com o resultado,
+    # para serem registradas no processo principal
+    metricas = {'etapa': "parse", 'arquivo': tarefa[1]}
+    inicio = time.perf_counter()
+    with medir_memoria(metricas):
+        df_long = transformar_membro(tarefa)
+    metricas.update(
+        segundos=round(time.perf_counter() - inicio, 4),
+        linhas_entrada=df_long.attrs.get('linhas_entrada', 0) if df_long is not None else 0,
+        linhas_saida=len(df_long) if df_long is not None else 0,
+    )
+    return df_long, metricas
+
+def executar_tarefas(tarefas: list, max_processos: int = USGS_MAX_PROCESSOS) -> list:
+    # Com max_processos <= 1 roda no processo atual; caso contrário distribui as tarefas num ProcessPoolExecutor.
+    # executor.map preserva a ordem das tarefas, então o resultado é idêntico ao do modo serial
+    if max_processos <= 1:
+        resultados = [_transformar_membro_medido(tarefa) for tarefa in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            resultados = list(executor.map(_transformar_membro_medido, tarefas))
+    for _, metricas in resultados:
+        registrar_etapa(metricas)
+    return [(tarefa, df_long) for tarefa, (df_long, _) in zip(tarefas, resultados) if df_long is not None]